@@ -1,27 +1,52 @@
+import contextlib
 import importlib
+import io
 import logging
 import logging.config
 import os
 import pkgutil
 import sys
+import time
 from dotenv import load_dotenv
 
 # Importing  command classes
-from app.commands import CommandHandler
+from app.async_logging import AsyncLogging
+from app.calculation_history import CalculationHistory
+from app.commands import CommandHandler, LazyCommand
+from app.plugin_manifest import load_manifest
+from app.metrics import PeriodicDump
+from app.profiling import save_profile
 from app.plugins.menu import MenuCommand
 
+# Modules expensive enough to be worth reporting when they are loaded at startup
+HEAVY_MODULES = ('pandas', 'numpy')
+
+# Batch output is written to the real stdout once this many characters have accumulated
+BATCH_OUTPUT_BUFFER_SIZE = 64 * 1024
+
+# Commands that ask for confirmation on the console; batches must pass --yes instead
+CONFIRMED_COMMANDS = ('clear',)
+
+# Plugins whose command class is constructed with the command handler
+HANDLER_PLUGINS = ('menu', 'profile')
+
 
 class App:
     """Main application class responsible for initializing and running the command interface."""
 
     def __init__(self):
         """Initializes the application by configuring logging, loading environment variables, and setting up command handling."""
+        started = time.perf_counter()
+        self.startup_timings = {}
+        self.async_logging = None
+        self.metrics_dump = None
         self.ensure_log_directory()
-        self.configure_logging()
         load_dotenv()
+        self.configure_logging()
         self.settings = self.load_environment_variables()
         self.settings.setdefault('ENVIRONMENT', 'PRODUCTION')
         self.command_handler = CommandHandler()
+        self.startup_timings['App()'] = time.perf_counter() - started
 
     def ensure_log_directory(self):
         """Ensure that the log directory exists."""
@@ -34,8 +59,17 @@ class App:
             logging.config.fileConfig(logging_conf_path, disable_existing_loggers=False)
         else:
             logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        if os.getenv('LOG_ASYNC', 'false').strip().lower() in ('1', 'true', 'yes'):
+            # Keep disk latency off the command path; records are written by a background thread
+            self.async_logging = AsyncLogging(float(os.getenv('LOG_SUCCESS_SAMPLE_RATE', '1.0')))
+            self.async_logging.start()
         logging.info("Logging configured.")
 
+    def shutdown_logging(self):
+        """Flushes any queued log records before the application exits."""
+        if self.async_logging is not None:
+            self.async_logging.stop()
+
     def load_environment_variables(self):
         """Loads and returns environment variables as a dictionary."""
         settings = {key: value for key, value in os.environ.items()}
@@ -72,23 +106,186 @@ class App:
     def create_command_instance(self, plugin_module, plugin_name):
         """Creates an instance of a command, handling special cases as necessary."""
         command_class_name = f'{plugin_name.capitalize()}Command'
-        if plugin_name.lower() == 'menu':
+        if plugin_name.lower() in HANDLER_PLUGINS:
             return getattr(plugin_module, command_class_name)(self.command_handler)
         return getattr(plugin_module, command_class_name)()
 
+    def plugin_directories(self):
+        """Returns the (path, package) pairs that plugins are loaded from."""
+        plugins_package = 'app.plugins'
+        return [
+            (os.path.join(plugins_package.replace('.', '/'), 'history'), f'{plugins_package}.history'),
+            (plugins_package.replace('.', '/'), f'{plugins_package}'),
+        ]
+
     def load_plugins(self):
         """Loads all plugins from the plugins directory."""
-        plugins_package = 'app.plugins'
-        self.load_plugin_commands(os.path.join(plugins_package.replace('.', '/'), 'history'), f'{plugins_package}.history')
-        self.load_plugin_commands(plugins_package.replace('.', '/'), f'{plugins_package}')
+        if self.settings.get('PLUGIN_LOADING', 'lazy').lower() == 'eager':
+            for path, package in self.plugin_directories():
+                self.load_plugin_commands(path, package)
+            return
+        self.register_lazy_plugins()
 
-    def start(self):
-        """Starts the application, handling user input and executing commands."""
+    def register_lazy_plugins(self):
+        """Registers a proxy per plugin from the cached manifest; plugins are imported on first use."""
+        manifest_path = self.settings.get('PLUGIN_MANIFEST_PATH', os.path.join('data', 'plugin_manifest.json'))
+        for plugin in load_manifest(manifest_path, self.plugin_directories()):
+            init_args = (self.command_handler,) if plugin['name'].lower() in HANDLER_PLUGINS else ()
+            self.command_handler.register_command(
+                plugin['name'], LazyCommand(plugin['module'], plugin['class'], *init_args))
+
+    def prepare(self):
+        """Loads plugins and registers the built-in commands."""
+        started = time.perf_counter()
         self.load_plugins()
         self.command_handler.register_command("menu", MenuCommand(self.command_handler))
+        self.startup_timings['load plugins'] = time.perf_counter() - started
+        self.start_metrics_dump()
+
+    def start_metrics_dump(self):
+        """Rewrites METRICS_DUMP_PATH every METRICS_DUMP_INTERVAL seconds when a path is configured."""
+        path = os.environ.get('METRICS_DUMP_PATH')
+        if path and self.metrics_dump is None:
+            self.metrics_dump = PeriodicDump(path, float(os.environ.get('METRICS_DUMP_INTERVAL', '60'))).start()
+
+    def save_session_profile(self, path=None):
+        """Stops profiling started with --profile and writes the results, reporting them on stderr."""
+        profiler = self.command_handler.stop_profiling()
+        if profiler is None:
+            return
+        path, summary_path, summary = save_profile(profiler, path)
+        logging.info(f"Session profile written to {path} and {summary_path}.")
+        print(summary.rstrip(), file=sys.stderr)
+        print(f"Profile written to {path} (summary in {summary_path}).", file=sys.stderr)
+
+    def startup_report(self, import_seconds=None):
+        """Returns a text report of startup timings and which heavy modules were imported."""
+        timings = {}
+        if import_seconds is not None:
+            timings['import app'] = import_seconds
+        timings.update(self.startup_timings)
+        lines = ["Startup profile:"]
+        lines += [f"  {label:<14}{seconds * 1000:8.1f} ms" for label, seconds in timings.items()]
+        lines.append(f"  {'total':<14}{sum(timings.values()) * 1000:8.1f} ms")
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        lines.append(f"  heavy modules loaded: {', '.join(loaded) or 'none'}")
+        return "\n".join(lines)
+
+    def start(self):
+        """Starts the application, handling user input and executing commands."""
+        self.prepare()
         print("Type 'menu' to display available commands.\nType 'exit' to exit.")
         self.run_command_loop()
 
+    def start_batch(self, source='-', on_error='continue', flush_interval=0, jobs=1):
+        """Runs the commands in a file (or stdin for '-') without prompting and returns an exit code."""
+        self.prepare()
+        try:
+            if source == '-':
+                return self.run_batch(sys.stdin, on_error, flush_interval, jobs)
+            with open(source, encoding='utf-8') as commands:
+                return self.run_batch(commands, on_error, flush_interval, jobs)
+        finally:
+            CalculationHistory.shutdown()
+            self.shutdown_logging()
+
+    def start_server(self, host='127.0.0.1', port=8765, http_port=None, commit_window=0.05):
+        """Serves commands to network clients until interrupted."""
+        # asyncio and the server are only imported for --serve, keeping them off every other startup
+        import asyncio
+        from app.server import CalculatorServer
+        self.prepare()
+        server = CalculatorServer(self.command_handler, commit_window)
+        try:
+            asyncio.run(server.serve(host, port, http_port))
+        except KeyboardInterrupt:
+            logging.info("Server interrupted and exiting gracefully.")
+        finally:
+            logging.info(f"Server shutdown after {server.requests} requests.")
+            CalculationHistory.shutdown()
+            self.shutdown_logging()
+
+    def run_batch(self, lines, on_error='continue', flush_interval=0, jobs=1):
+        """Streams command lines through the command handler, buffering output and history writes.
+
+        With jobs > 1, arithmetic commands are evaluated ahead in a process pool
+        and merged back in input order.
+        """
+        if on_error not in ('continue', 'stop'):
+            raise ValueError(f"Unknown batch error policy: {on_error}")
+        history = CalculationHistory()
+        history.autoflush = False
+        real_stdout, real_stdin = sys.stdout, sys.stdin
+        output = io.StringIO()
+        executed = failed = 0
+        started = time.perf_counter()
+        # The batch may itself be stdin, read ahead in shards with --jobs, so commands see an
+        # empty stdin instead; that way no command's input depends on the number of jobs
+        sys.stdin = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                commands = self.batch_commands(lines)
+                if jobs > 1:
+                    # The process pool machinery is only imported when --jobs asks for it
+                    from app.parallel_batch import run_parallel
+                    results = run_parallel(commands, self.execute_batch_line, jobs)
+                else:
+                    results = ((input_command, self.execute_batch_line(input_command)) for input_command in commands)
+                for input_command, succeeded in results:
+                    executed += 1
+                    if not succeeded:
+                        failed += 1
+                        if on_error == 'stop':
+                            logging.error(f"Batch stopped at command {executed}: {input_command}")
+                            break
+                    if flush_interval and executed % flush_interval == 0:
+                        history.flush()
+                    if output.tell() >= BATCH_OUTPUT_BUFFER_SIZE:
+                        self.drain_output(output, real_stdout)
+        except KeyboardInterrupt:
+            logging.info("Batch interrupted.")
+        finally:
+            sys.stdin = real_stdin
+            history.flush()
+            history.autoflush = True
+            self.drain_output(output, real_stdout)
+        elapsed = time.perf_counter() - started
+        rate = executed / elapsed if elapsed > 0 else 0.0
+        print(f"Processed {executed} commands ({failed} failed) in {elapsed:.3f}s, {rate:.0f} ops/sec.", file=sys.stderr)
+        logging.info(f"Batch finished: {executed} commands, {failed} failed, {rate:.0f} ops/sec.")
+        return 1 if failed and on_error == 'stop' else 0
+
+    @staticmethod
+    def batch_commands(lines):
+        """Yields the commands in batch input, skipping blanks and comments and stopping at 'exit'."""
+        for line in lines:
+            input_command = line.strip()
+            if not input_command or input_command.startswith('#'):
+                continue
+            if input_command.lower() == 'exit':
+                break
+            yield input_command
+
+    def execute_batch_line(self, input_command):
+        """Executes a single batch line, returning whether it succeeded."""
+        command_parts = input_command.split(maxsplit=1)
+        command_name = command_parts[0].lower()
+        args = command_parts[1] if len(command_parts) > 1 else ""
+        if command_name in CONFIRMED_COMMANDS and args.strip() != '--yes':
+            # Batch stdout is buffered and stdin may hold the commands, so nobody could answer a prompt
+            logging.warning(f"Batch command '{command_name}' refused without --yes.")
+            print(f"Error: '{command_name}' asks for confirmation; use '{command_name} --yes' in a batch.")
+            return False
+        return self.command_handler.execute_command(command_name, args)
+
+    @staticmethod
+    def drain_output(output, stream):
+        """Writes buffered batch output to the given stream and empties the buffer."""
+        stream.write(output.getvalue())
+        stream.flush()
+        output.seek(0)
+        output.truncate()
+
     def run_command_loop(self):
         """Runs the main command loop, processing user input."""
         try:
@@ -103,6 +300,8 @@ class App:
             sys.exit(0)
         finally:
             logging.info("Application shutdown.")
+            CalculationHistory.shutdown()
+            self.shutdown_logging()
 
     def process_input_command(self, input_command):
         """Processes a single input command."""
@@ -0,0 +1,9 @@
+import math
+
+def exact_sum(values):
+    """Adds floats with one exact rounding, so long sums do not accumulate error."""
+    try:
+        return math.fsum(values)
+    except (OverflowError, ValueError):
+        # fsum rejects inf - inf and intermediate overflow; plain addition yields inf/nan instead
+        return sum(values)
@@ -0,0 +1,60 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import re
+
+# Per-operation success records that may be sampled when logging is asynchronous
+SUCCESS_MESSAGE = re.compile(r"^Executing command:|operation recorded successfully")
+
+class SuccessSampleFilter(logging.Filter):
+    """Keeps only a fraction of the routine per-operation success records."""
+
+    def __init__(self, sample_rate):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        if record.levelno != logging.INFO or not SUCCESS_MESSAGE.search(record.getMessage()):
+            return True
+        return random.random() < self.sample_rate
+
+class AsyncLogging:
+    """Moves the root logger's handlers behind a queue drained by a background thread."""
+
+    def __init__(self, sample_rate=1.0):
+        self.sample_rate = sample_rate
+        self.listener = None
+        self.handlers = []
+        self.queue_handler = None
+
+    def start(self):
+        """Routes root log records through a QueueHandler to a QueueListener thread."""
+        if self.listener is not None:
+            return
+        root = logging.getLogger()
+        self.handlers = root.handlers[:]
+        log_queue = queue.SimpleQueue()
+        self.queue_handler = logging.handlers.QueueHandler(log_queue)
+        if self.sample_rate < 1:
+            self.queue_handler.addFilter(SuccessSampleFilter(self.sample_rate))
+        for handler in self.handlers:
+            root.removeHandler(handler)
+        root.addHandler(self.queue_handler)
+        self.listener = logging.handlers.QueueListener(log_queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Drains the queue, stops the writer thread and restores the original handlers."""
+        if self.listener is None:
+            return
+        root = logging.getLogger()
+        root.removeHandler(self.queue_handler)
+        self.listener.stop()
+        self.listener = None
+        for handler in self.handlers:
+            root.addHandler(handler)
+            handler.flush()
+        atexit.unregister(self.stop)
@@ -1,68 +1,438 @@
+import itertools
+import logging
 import os
-import pandas as pd
+import threading
 from dotenv import load_dotenv
+from app.delete_log import DeleteLog
+from app.file_lock import FileLock
+from app.group_commit import GroupCommitWriter
+from app.history_backends import backend_for_path, create_backend
+from app.history_buffer import HistoryBuffer
+from app.history_index import HistoryIndex
+from app.history_segments import SegmentArchive
+from app.history_stats import HistoryStats, operation_type
 
 class CalculationHistory:
     _instance = None
+    _instance_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(CalculationHistory, cls).__new__(cls)
-            cls._instance.initialize()
+            with cls._instance_lock:
+                # Publish the instance only once it is fully initialized
+                if cls._instance is None:
+                    instance = super(CalculationHistory, cls).__new__(cls)
+                    instance.initialize()
+                    cls._instance = instance
         return cls._instance
 
     def initialize(self):
         load_dotenv()
         self.history_file = os.getenv('HISTORY_FILE_PATH')
         self.history_file = os.path.abspath(self.history_file)
-        self.history_df = self.load_or_initialize_history()
+        # HISTORY_BACKEND picks the storage format ('csv', 'binary' or 'sqlite');
+        # without it the history file's extension decides
+        backend_name = os.environ.get('HISTORY_BACKEND') or backend_for_path(self.history_file)
+        self.backend = create_backend(backend_name, self.history_file,
+                                      fsync_policy=os.environ.get('HISTORY_FSYNC', 'never').strip().lower())
+        # Every read or mutation of the buffer, tombstones and store holds this lock
+        self.lock = threading.RLock()
+        # Processes sharing the history file take this advisory lock around every write to it
+        self.file_lock = FileLock(f"{self.history_file}.lock")
+        # With autoflush off, new rows wait in _pending until flush() is called
+        self.autoflush = True
+        self._pending = []
+        self._frame = None
+        # Search indexes are built on the first find and maintained from then on
+        self._index = None
+        with self.file_lock:
+            self.buffer = self.load_or_initialize_history()
+        # Deleted records are tombstoned by position and only removed from the store on compaction
+        self.compact_ratio = float(os.environ.get('HISTORY_COMPACT_RATIO', '0.25'))
+        self.delete_log = DeleteLog(f"{self.history_file}.deleted")
+        self.deleted = {index for index in self.delete_log.load() if index < len(self.buffer)}
+        # HISTORY_RETAIN > 0 keeps only the newest records in memory and in the history file;
+        # older ones are rolled into compressed segments HISTORY_SEGMENT_RECORDS at a time
+        self.retain = int(os.environ.get('HISTORY_RETAIN', '0'))
+        self.segment_records = max(1, int(os.environ.get('HISTORY_SEGMENT_RECORDS', '10000')))
+        self.archive = SegmentArchive(f"{self.history_file}.segments",
+                                      os.environ.get('HISTORY_SEGMENT_COMPRESSION', 'gzip').strip().lower())
+        # Running per-operation aggregates, saved beside the history on close
+        self.stats_file = f"{self.history_file}.stats"
+        self.stats = (HistoryStats.load(self.stats_file, self.stats_fingerprint())
+                      or HistoryStats.rebuild(self.buffer, self.deleted, self.archive.rows()))
+        # HISTORY_COMMIT_WINDOW > 0 hands autoflushed rows to a writer thread that
+        # commits everything concurrent callers submitted within the window at once
+        commit_window = float(os.environ.get('HISTORY_COMMIT_WINDOW', '0'))
+        self.writer = GroupCommitWriter(lambda rows: self.append_records(rows), commit_window) if commit_window > 0 else None
+        if self.retain and len(self.buffer) > self.retain:
+            self.roll_segments()
+
+    def stats_fingerprint(self):
+        return {**HistoryStats.fingerprint(self.history_file, self.buffer, self.deleted), 'archived': self.archive.count}
+
+    @property
+    def history_df(self):
+        # Only build a DataFrame when someone actually asks for one
+        with self.lock:
+            self.refresh()
+            if self._frame is None:
+                frame = self.buffer.to_frame()
+                self._frame = frame.drop(index=sorted(self.deleted)) if self.deleted else frame
+            return self._frame
+
+    @history_df.setter
+    def history_df(self, frame):
+        with self.lock:
+            self.buffer = HistoryBuffer.from_frame(frame)
+            self.deleted = set()
+            # Logged tombstones point at the old records, so they must not outlive them
+            with self.file_lock:
+                self.delete_log.clear()
+            self.stats = HistoryStats.rebuild(self.buffer, self.deleted, self.archive.rows())
+            self._index = None
+            self._frame = frame
 
     def load_or_initialize_history(self):
-        if os.path.exists(self.history_file):
-            return pd.read_csv(self.history_file)
+        if self.backend.exists():
+            return self.backend.load()
         else:
-            return pd.DataFrame(columns=['Operation', 'Result'])
+            return HistoryBuffer()
+
+    def refresh(self):
+        """Picks up records another process wrote to the store and returns how many were read.
+
+        An unchanged store costs one stat call, a store that only grew is read
+        from where the last read stopped, and anything else is loaded again.
+        """
+        with self.lock:
+            # Pending rows go out first; the writer thread needs the file lock to store them
+            self.flush()
+            with self.file_lock:
+                return self._merge()
+
+    def _merge(self):
+        # Callers hold the file lock, so the store and delete log cannot move underneath
+        merged = 0
+        if self.backend.changed():
+            rows = self.backend.read_appended()
+            if rows is None:
+                self.archive.segments = self.archive.load_manifest()
+                self.buffer = self.load_or_initialize_history()
+                self.deleted = {index for index in self.delete_log.load() if index < len(self.buffer)}
+                self.stats = HistoryStats.rebuild(self.buffer, self.deleted, self.archive.rows())
+                self._index = None
+                self._frame = None
+                logging.info(f"History reloaded: {len(self.buffer)} records.")
+                return len(self.buffer)
+            if rows:
+                operations, results = [row[0] for row in rows], [row[1] for row in rows]
+                start = len(self.buffer)
+                self.buffer.extend(operations, results)
+                self.stats.add_many(operations, results)
+                if self._index is not None:
+                    self._index.add(start)
+                self._frame = None
+                logging.info(f"History picked up {len(rows)} new records.")
+            merged = len(rows)
+        # Tombstones other processes logged since the last read
+        for position in self.delete_log.read_new():
+            if position < len(self.buffer) and position not in self.deleted:
+                self.deleted.add(position)
+                self.stats.remove(self.buffer.operations[position], self.buffer.results[position])
+                self._frame = None
+        return merged
 
     def add_record(self, operation, result):
-    # Create a new DataFrame for the record to add
-        new_record_df = pd.DataFrame([{'Operation': operation, 'Result': result}])
-    # Exclude columns in new_record_df that are entirely NA
-        cleaned_new_record_df = new_record_df.dropna(axis=1, how='all')
-    
-    # Concatenate the new record DataFrame with the existing history DataFrame
-        self.history_df = pd.concat([self.history_df, cleaned_new_record_df], ignore_index=True)
-    
-    # Save the updated history
-        self.save_history()
+        with self.lock:
+            # Grow the in-memory buffer; the cached DataFrame is now stale
+            self.buffer.append(operation, result)
+            self.stats.add(operation, result)
+            if self._index is not None:
+                self._index.add(len(self.buffer) - 1)
+            self._frame = None
+            # Append only the new row instead of rewriting the whole file
+            ticket = self.store([(operation, result)])
+            self.enforce_retention()
+        self.wait_for(ticket)
 
-    def save_history(self):
-        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
-        self.history_df.to_csv(self.history_file, index=False)
+    def add_records(self, operations, results):
+        # Batched version of add_record: one buffer extend and one file write
+        if not operations:
+            return
+        with self.lock:
+            start = len(self.buffer)
+            self.buffer.extend(operations, results)
+            self.stats.add_many(operations, results)
+            if self._index is not None:
+                self._index.add(start)
+            self._frame = None
+            ticket = self.store(zip(operations, results))
+            self.enforce_retention()
+        self.wait_for(ticket)
+
+    def enforce_retention(self):
+        # Roll a whole segment at a time so the hot file is only rewritten once per segment
+        if self.retain and len(self.buffer) >= self.retain + self.segment_records:
+            self.roll_segments()
 
-    def load_history(self):
-        if os.path.exists(self.history_file):
-            self.history_df = pd.read_csv(self.history_file)
-            print(self.history_df.to_string(index=False))
+    def roll_segments(self):
+        """Moves the live records older than the newest HISTORY_RETAIN into a compressed segment."""
+        with self.lock:
+            self.flush()
+            with self.file_lock:
+                live = self._roll_segments()
+        if live is not None:
+            logging.info(f"History rolled {len(live)} records into segment {len(self.archive.segments)}.")
+
+    def _roll_segments(self):
+        self._merge()
+        count = len(self.buffer) - self.retain
+        if count <= 0:
+            return None
+        live = [position for position in range(count) if position not in self.deleted]
+        operations, results = self.buffer.operations, self.buffer.results
+        # The segment is complete before the hot file drops its records, so a crash cannot lose them
+        self.archive.roll([operations[position] for position in live], [results[position] for position in live])
+        self.buffer = HistoryBuffer(operations[count:], results[count:])
+        self.deleted = {position - count for position in self.deleted if position >= count}
+        self.delete_log.clear()
+        for position in sorted(self.deleted):
+            self.delete_log.append(position)
+        self.backend.drop_head(count, self.buffer)
+        self._index = None
+        self._frame = None
+        return live
+
+    def store(self, rows):
+        # Called with the lock held, so store order always matches buffer order
+        if not self.autoflush:
+            self._pending.extend(rows)
+        elif self.writer is not None:
+            return self.writer.submit(rows)
         else:
+            self.append_records(rows)
+        return None
+
+    def wait_for(self, ticket):
+        # Group commit: block outside the lock until the writer has stored our rows
+        if ticket is not None:
+            self.writer.wait(ticket)
+
+    @property
+    def has_pending(self):
+        """Tells whether rows are waiting for flush() because autoflush is off."""
+        return bool(self._pending)
+
+    def flush(self):
+        with self.lock:
+            if self._pending:
+                pending, self._pending = self._pending, []
+                if self.writer is None:
+                    self.append_records(pending)
+                else:
+                    self.writer.submit(pending)
+            if self.writer is not None:
+                self.writer.drain()
+
+    def append_records(self, rows):
+        # Appends from several processes never interleave, and rows already stored are never rewritten
+        with self.file_lock:
+            self.backend.append(rows)
+
+    @classmethod
+    def shutdown(cls):
+        """Closes the history if it was used, so pending rows and the running stats are saved."""
+        with cls._instance_lock:
+            instance, cls._instance = cls._instance, None
+        if instance is not None:
+            instance.close()
+
+    def close(self):
+        # Rows held back by autoflush=False would otherwise be lost, and the stats would not match the file
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+        self.backend.close()
+        self.delete_log.close()
+        self.file_lock.close()
+        try:
+            self.stats.save(self.stats_file, self.stats_fingerprint())
+        except OSError as e:
+            logging.warning(f"Could not save history stats '{self.stats_file}': {e}")
+
+    def save_history(self):
+        with self.lock:
+            # Full rewrites are reserved for delete/clear; pending rows are already in the buffer,
+            # but rows already handed to the writer must land before the rewrite replaces them
+            self._pending = []
+            if self.writer is not None:
+                self.writer.drain()
+            with self.file_lock:
+                self.backend.rewrite(self.buffer)
+
+    def load_history(self, offset=0, limit=None, tail=None):
+        with self.lock:
+            self.flush()
+            # Reading under the file lock keeps another process's rewrite from swapping the store mid-read
+            with self.file_lock:
+                return self._load_history(offset, limit, tail)
+
+    def _load_history(self, offset, limit, tail):
+        if not self.backend.exists() and not self.archive.count:
             print("History file does not exist.")
+            return None
+        # Rows are streamed from the store chunk by chunk instead of printed as one big string
+        self._merge()
+        chunk_size = int(os.environ.get('HISTORY_LOAD_CHUNK_SIZE', '1000'))
+        # Archived records come first and keep indexes 0..base-1; the hot store follows
+        base = self.archive.count
+        if tail is not None:
+            position = self.tail_position(tail)
+            live = len(self.buffer) - position - sum(1 for deleted in self.deleted if deleted >= position)
+            if live < tail and base:
+                offset = max(0, base - (tail - live))
+                chunks = itertools.chain(self.archive.iter_rows(offset, None, chunk_size),
+                                         self.backend.iter_rows(0, None, chunk_size))
+            else:
+                offset = base + position
+                chunks = self.backend.iter_tail(len(self.buffer) - position, chunk_size)
+        elif offset < base:
+            hot_limit = None if limit is None else limit - (base - offset)
+            chunks = self.archive.iter_rows(offset, limit, chunk_size)
+            if hot_limit is None or hot_limit > 0:
+                chunks = itertools.chain(chunks, self.backend.iter_rows(0, hot_limit, chunk_size))
+        else:
+            chunks = self.backend.iter_rows(offset - base, limit, chunk_size)
+        index, shown = offset, 0
+        for chunk in chunks:
+            lines = [f"{index + i:>6}  {operation:<24}  {result}"
+                     for i, (operation, result) in enumerate(chunk) if index + i - base not in self.deleted]
+            if lines and not shown:
+                print(f"{'Index':>6}  {'Operation':<24}  Result")
+            if lines:
+                print("\n".join(lines))
+            index += len(chunk)
+            shown += len(lines)
+        return shown > 0
+
+    def tail_position(self, count):
+        # Walk back from the end, skipping tombstones, until count live records are covered
+        position = len(self.buffer)
+        while count > 0 and position > 0:
+            position -= 1
+            if position not in self.deleted:
+                count -= 1
+        return position
 
     def clear_history(self):
-        self.history_df = pd.DataFrame(columns=['Operation', 'Result'])
-        self.save_history()
+        with self.lock:
+            # The writer must be idle before the file lock is taken, since it needs that lock too
+            self.flush()
+            with self.file_lock:
+                self.buffer.clear()
+                self.deleted = set()
+                self.stats.clear()
+                self._index = None
+                self.delete_log.clear()
+                self.archive.clear()
+                self._frame = None
+                self.save_history()
         print("History cleared.")
 
     def delete_history(self, index):
-        if not os.path.exists(self.history_file) or self.history_df.empty:
+        with self.lock:
+            return self._delete_history(index)
+
+    def _delete_history(self, index):
+        # Rows still waiting for a batch flush must be in the store before it is checked
+        self.flush()
+        with self.file_lock:
+            # Indexes refer to the shared file, so other processes' rows and deletes are merged first
+            self._merge()
+            if not self._tombstone(index):
+                return False
+        if self.dead_ratio() > self.compact_ratio:
+            self.compact_history()
+        return True
+
+    def _tombstone(self, index):
+        base = self.archive.count
+        if 0 <= index < base:
+            print(f"Record at index {index} is archived and cannot be deleted.")
+            return False
+        if not self.backend.exists() or len(self.buffer) == len(self.deleted):
             print("History file does not exist or is empty.")
             return False
-        try:
-            self.history_df = self.history_df.drop(index).reset_index(drop=True)
-            self.save_history()
-            print(f"Record at index {index} deleted.")
-            return True
-        except KeyError:
+        position = index - base
+        if not 0 <= position < len(self.buffer) or position in self.deleted:
             print(f"Invalid index: {index}. No record deleted.")
             return False
+        # Constant time: record a tombstone instead of rewriting the store
+        self.deleted.add(position)
+        self.stats.remove(self.buffer.operations[position], self.buffer.results[position])
+        self.delete_log.append(position)
+        self._frame = None
+        print(f"Record at index {index} deleted.")
+        return True
+
+    def last_result(self):
+        """Returns the most recent live result, raising KeyError when there is none."""
+        with self.lock:
+            for index in range(len(self.buffer) - 1, -1, -1):
+                if index not in self.deleted:
+                    return self.buffer.results[index]
+            return self.archive.last_result()
+
+    def statistics(self):
+        """Returns the running aggregates by operation type, rescanning min/max only after a deleted extreme."""
+        with self.lock:
+            self.refresh()
+            for op_type, stats in self.stats.by_type.items():
+                if stats.stale:
+                    live = ((operation, result) for index, (operation, result)
+                            in enumerate(zip(self.buffer.operations, self.buffer.results)) if index not in self.deleted)
+                    stats.rescan_extremes([result for operation, result in itertools.chain(self.archive.rows(), live)
+                                           if operation_type(operation) == op_type])
+            return dict(self.stats.by_type)
+
+    def find(self, operation=None, operand=None, low=None, high=None):
+        """Returns (index, operation, result) for live records matching every given filter, oldest first."""
+        with self.lock:
+            self.refresh()
+            if self._index is None:
+                self._index = HistoryIndex(self.buffer)
+            positions = self._index.find(operation, operand, low, high)
+            base = self.archive.count
+            # Archived segments are scanned, skipping those whose zone map rules them out
+            matches = list(self.archive.find(operation, operand, low, high))
+            matches.extend((base + position, self.buffer.operations[position], self.buffer.results[position])
+                           for position in positions if position not in self.deleted)
+            return matches
+
+    def dead_ratio(self):
+        return len(self.deleted) / len(self.buffer) if len(self.buffer) else 0.0
+
+    def compact_history(self):
+        with self.lock:
+            # Compaction works on the stored file, so it must hold every buffered row first
+            self.flush()
+            with self.file_lock:
+                # Rows other processes appended must survive the rewrite, and the tombstones
+                # to drop are whatever is logged now, not what this process last saw
+                self._merge()
+                if not self.deleted:
+                    return 0
+                positions = sorted(self.deleted)
+                self.buffer.compact(self.deleted)
+                self.backend.compact(positions, self.buffer)
+                self.deleted = set()
+                self.delete_log.clear()
+                # Positions were renumbered, so the search indexes are stale
+                self._index = None
+                self._frame = None
+        logging.info(f"History compacted: {len(positions)} deleted records removed.")
+        return len(positions)
 
 # Example usage:
 '''if __name__ == "__main__":
@@ -1,5 +1,8 @@
+import cProfile
+import importlib
 import logging
 from abc import ABC, abstractmethod
+from app.metrics import begin_command, end_command, timed
 
 # Setup basic configuration for logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -9,22 +12,76 @@ class Command(ABC):
     def execute(self, args=None):
         pass
 
+class LazyCommand(Command):
+    """Stands in for a plugin command until it is first executed."""
+
+    def __init__(self, module_name, class_name, *init_args):
+        self.module_name = module_name
+        self.class_name = class_name
+        self.init_args = init_args
+
+    def resolve(self):
+        """Imports the plugin module and instantiates the real command."""
+        plugin_module = importlib.import_module(self.module_name)
+        return getattr(plugin_module, self.class_name)(*self.init_args)
+
+    def execute(self, args=None):
+        return self.resolve().execute(args)
+
 class CommandHandler:
     def __init__(self):
         self.commands = {}
         self.logger = logging.getLogger(self.__class__.__name__)
+        # While set, every command runs under this cProfile.Profile
+        self.profiler = None
 
     def register_command(self, name, command_obj):
         self.commands[name] = command_obj
         self.logger.info(f"Command '{name}' registered.")
 
+    def start_profiling(self):
+        """Starts profiling command execution; returns False if a profile is already running."""
+        if self.profiler is not None:
+            return False
+        self.profiler = cProfile.Profile()
+        return True
+
+    def stop_profiling(self):
+        """Stops profiling and returns the profiler, or None if none was running."""
+        profiler, self.profiler = self.profiler, None
+        if profiler is not None:
+            profiler.disable()
+        return profiler
+
     def execute_command(self, command_name, args=""):
         if command_name in self.commands:
-            self.logger.info(f"Executing command: {command_name} with arguments: {args}")
+            # Phases the plugin times are added up and recorded once for this command
+            begin_command(command_name)
+            profiler = self.profiler
+            if profiler is not None:
+                profiler.enable()
             try:
-                self.commands[command_name].execute(args)
-            except Exception as e:
-                self.logger.error(f"Error executing command '{command_name}': {e}", exc_info=True)
+                with timed('total'):
+                    return self.run_command(command_name, args)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                end_command()
         else:
             self.logger.warning(f"No such command: {command_name}")
             print(f"No such command: {command_name}")
+            return False
+
+    def run_command(self, command_name, args):
+        with timed('log'):
+            self.logger.info(f"Executing command: {command_name} with arguments: {args}")
+        try:
+            command = self.commands[command_name]
+            if isinstance(command, LazyCommand):
+                # First use: swap the proxy for the real command
+                command = self.commands[command_name] = command.resolve()
+            # Plugins report their own errors and return False; anything else counts as success
+            return command.execute(args) is not False
+        except Exception as e:
+            self.logger.error(f"Error executing command '{command_name}': {e}", exc_info=True)
+            return False
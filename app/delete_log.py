@@ -0,0 +1,60 @@
+import os
+
+class DeleteLog:
+    """Append-only log of tombstoned history positions, kept next to the history file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._handle = None
+        # Bytes of the log this process has read or written
+        self.offset = 0
+
+    def load(self):
+        """Returns the set of positions marked as deleted."""
+        self.offset = 0
+        return set(self.read_new())
+
+    def read_new(self):
+        """Returns the positions other processes logged since the last read; only complete lines are consumed."""
+        try:
+            size = os.stat(self.path).st_size
+            if size == self.offset:
+                return []
+            with open(self.path, 'rb') as log:
+                if size < self.offset:
+                    # The log was cleared and started again
+                    self.offset = 0
+                log.seek(self.offset)
+                data = log.read(size - self.offset)
+        except FileNotFoundError:
+            self.offset = 0
+            return []
+        end = data.rfind(b'\n') + 1
+        self.offset += end
+        return [int(line) for line in data[:end].split() if line.isdigit()]
+
+    def append(self, index):
+        """Records one more deleted position."""
+        # A log cleared by another process is unlinked, so the open handle would write nowhere
+        if self._handle is not None and os.fstat(self._handle.fileno()).st_nlink == 0:
+            self.close()
+        if self._handle is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._handle = open(self.path, 'a', encoding='utf-8')
+        self._handle.write(f"{index}\n")
+        self._handle.flush()
+        self.offset = os.fstat(self._handle.fileno()).st_size
+
+    def clear(self):
+        """Forgets every tombstone, e.g. after the store has been compacted."""
+        self.close()
+        self.offset = 0
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+        self._handle = None
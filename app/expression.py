@@ -0,0 +1,79 @@
+import ast
+import math
+import operator
+from functools import lru_cache
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+UNARY_OPERATORS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+CONSTANTS = {'pi': math.pi, 'e': math.e}
+# Names looked up at evaluation time; 'ans' is the most recent result in history
+VARIABLES = ('ans',)
+
+class ExpressionError(ValueError):
+    """Raised for expressions the calculator cannot parse or evaluate."""
+
+def _compile(node):
+    """Turns an AST node into a float (when it folds to a constant) or a closure taking the variables."""
+    if isinstance(node, ast.Expression):
+        return _compile(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return float(node.value)
+    if isinstance(node, ast.Name) and node.id in CONSTANTS:
+        return CONSTANTS[node.id]
+    if isinstance(node, ast.Name) and node.id in VARIABLES:
+        name = node.id
+        return lambda variables: variables[name]
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        function = BINARY_OPERATORS[type(node.op)]
+        left, right = _compile(node.left), _compile(node.right)
+        if isinstance(left, float) and isinstance(right, float):
+            return function(left, right)
+        left_fn = left if callable(left) else (lambda variables: left)
+        right_fn = right if callable(right) else (lambda variables: right)
+        return lambda variables: function(left_fn(variables), right_fn(variables))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        function = UNARY_OPERATORS[type(node.op)]
+        operand = _compile(node.operand)
+        if isinstance(operand, float):
+            return function(operand)
+        return lambda variables: function(operand(variables))
+    if isinstance(node, ast.Name):
+        raise ExpressionError(f"Unknown name: {node.id}")
+    raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+class CompiledExpression:
+    """An expression compiled once into a constant or a closure tree."""
+
+    def __init__(self, source, compiled):
+        self.source = source
+        self._compiled = compiled
+
+    @property
+    def is_constant(self):
+        return not callable(self._compiled)
+
+    def evaluate(self, variables=None):
+        """Returns the value of the expression for the given variables."""
+        value = self._compiled if self.is_constant else self._compiled(variables or {})
+        if not isinstance(value, float):
+            raise ExpressionError("The result is not a real number.")
+        return value
+
+@lru_cache(maxsize=256)
+def compile_expression(source):
+    """Parses and compiles source, folding constant sub-expressions; results are cached by source text."""
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {source}") from e
+    try:
+        return CompiledExpression(source.strip(), _compile(tree))
+    except OverflowError as e:
+        raise ExpressionError("The result is too large.") from e
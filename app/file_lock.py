@@ -0,0 +1,53 @@
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows has no advisory locks; the lock then only guards this process
+    fcntl = None
+
+class FileLock:
+    """Exclusive advisory lock on a file, shared by every process that uses the same path.
+
+    The lock is reentrant within a process, so a thread that already holds it
+    can take it again, while other threads wait as they would on an RLock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+
+    def acquire(self):
+        self._lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                if self._handle is None:
+                    self._handle = open(self.path, 'a+b')
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+            except FileNotFoundError:
+                # Without the directory there is no shared file to protect yet
+                pass
+            except BaseException:
+                self._lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._handle is not None:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def close(self):
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+            self._handle = None
@@ -0,0 +1,80 @@
+import logging
+import threading
+import time
+
+class GroupCommitWriter:
+    """Coalesces records from concurrent callers into one write per flush window.
+
+    Callers submit rows and block in wait() until a background thread has
+    written them; everything submitted while the thread sleeps through its
+    window goes out in a single write.
+    """
+
+    def __init__(self, write, window):
+        self.write = write
+        self.window = window
+        self.condition = threading.Condition()
+        self.pending = []
+        self.enqueued = 0
+        self.committed = 0
+        self.failures = []
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name='history-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, rows):
+        """Queues rows and returns the ticket to pass to wait()."""
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("History writer is closed.")
+            rows = list(rows)
+            self.pending.extend(rows)
+            self.enqueued += len(rows)
+            self.condition.notify_all()
+            return self.enqueued
+
+    def wait(self, ticket):
+        """Blocks until every row up to ticket is written; re-raises a failed write."""
+        with self.condition:
+            while self.committed < ticket:
+                self.condition.wait()
+            for start, end, error in self.failures:
+                if start < ticket <= end:
+                    raise error
+
+    def drain(self):
+        """Blocks until everything submitted so far is written."""
+        with self.condition:
+            ticket = self.enqueued
+        self.wait(ticket)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+            # Give other callers the rest of the window to join this batch
+            time.sleep(self.window)
+            with self.condition:
+                batch, self.pending = self.pending, []
+                start = self.committed
+            error = None
+            try:
+                self.write(batch)
+            except Exception as e:
+                logging.error(f"Group commit of {len(batch)} history records failed: {e}")
+                error = e
+            with self.condition:
+                self.committed = start + len(batch)
+                if error is not None:
+                    self.failures.append((start, self.committed, error))
+                self.condition.notify_all()
+
+    def close(self):
+        """Writes what is still queued and stops the background thread."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
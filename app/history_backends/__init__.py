@@ -0,0 +1,175 @@
+import os
+from abc import ABC, abstractmethod
+
+class HistoryBackend(ABC):
+    """Persists calculation records; CalculationHistory keeps the in-memory copy."""
+
+    def __init__(self, path, fsync_policy='never'):
+        self.path = path
+        # 'always' forces every write to disk, 'never' leaves it to the OS
+        self.fsync_policy = fsync_policy
+        # Signature of the store as of this backend's last load or write
+        self.synced = None
+        # Inode of the store this backend last read or wrote; rewrites swap in a new one
+        self.identity = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def signature(self):
+        """Returns a cheap fingerprint of the store that changes whenever it is written, or None if it is missing."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def mark_synced(self):
+        self.synced = self.signature()
+        if self.synced is not None:
+            self.identity = self.synced[0]
+
+    def replaced(self, signature):
+        """Tells whether the store was rewritten, i.e. is no longer the file this backend last synced with."""
+        return signature is None or signature[0] != self.identity
+
+    def close_if_replaced(self, *handles):
+        """Closes the open handles when another process rewrote the store, so the next append reopens it."""
+        if any(unlinked(handle) for handle in handles):
+            # Appending to the replaced file would lose the rows
+            self.close()
+
+    def append_at_tail(self, handle, synced_length, length, write):
+        """Calls write() to append through handle and returns the new synced length, or None.
+
+        length() measures the store in the backend's unit (bytes or records).
+        Callers hold the history file lock, so nobody else writes between the
+        check and the append. None means another process appended or rewrote
+        first, so the rows are no longer the tail this backend knows about.
+        """
+        created = self.identity is None and synced_length == length() == 0
+        in_sync = length() == synced_length and (os.fstat(handle.fileno()).st_ino == self.identity or created)
+        write()
+        if not in_sync:
+            return None
+        self.mark_synced()
+        return length()
+
+    def changed(self):
+        """Tells whether something else wrote to the store since this backend last loaded or wrote it."""
+        return self.signature() != self.synced
+
+    def read_appended(self):
+        """Returns the rows added to the store since it was last synced, or None when it must be loaded again in full."""
+        return None
+
+    @abstractmethod
+    def load(self):
+        """Reads the whole store into a HistoryBuffer."""
+
+    @abstractmethod
+    def append(self, rows):
+        """Adds (operation, result) rows to the end of the store."""
+
+    @abstractmethod
+    def rewrite(self, buffer):
+        """Replaces the store with the contents of buffer."""
+
+    def count(self):
+        """Returns the number of stored records."""
+        return len(self.load())
+
+    def iter_rows(self, offset=0, limit=None, chunk_size=1000):
+        """Yields lists of at most chunk_size (operation, result) rows, starting at position offset."""
+        buffer = self.load()
+        stop = len(buffer) if limit is None else min(offset + limit, len(buffer))
+        for start in range(offset, stop, chunk_size):
+            end = min(start + chunk_size, stop)
+            yield list(zip(buffer.operations[start:end], buffer.results[start:end]))
+
+    def iter_tail(self, count, chunk_size=1000):
+        """Yields the last count rows in chunks, oldest first."""
+        yield from self.iter_rows(max(self.count() - count, 0), count, chunk_size)
+
+    def compact(self, positions, buffer):
+        """Physically removes the records at positions; buffer already holds only the survivors."""
+        self.rewrite(buffer)
+
+    def drop_head(self, count, buffer):
+        """Physically removes the oldest count records, e.g. after a segment roll; buffer holds the rest."""
+        self.rewrite(buffer)
+
+    def close(self):
+        """Releases any open file handles."""
+
+# Backend used when HISTORY_BACKEND is not set, chosen by file extension
+EXTENSION_BACKENDS = {'.bin': 'binary', '.db': 'sqlite', '.sqlite': 'sqlite', '.sqlite3': 'sqlite'}
+
+def backend_for_path(path):
+    """Returns the backend name implied by the history file's extension."""
+    return EXTENSION_BACKENDS.get(os.path.splitext(path)[1].lower(), 'csv')
+
+def replace_file(path, write, mode='w', fsync=False, **open_args):
+    """Writes a new version of path next to it and swaps it in with os.replace.
+
+    Readers see either the old or the new file, never a half-written one, and
+    the new inode tells other processes the store was rewritten, not appended to.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, mode, **open_args) as handle:
+            write(handle)
+            handle.flush()
+            if fsync:
+                os.fsync(handle.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+def unlinked(handle):
+    """Tells whether an open file was deleted or replaced, so writing to it would be lost."""
+    return handle is not None and not handle.closed and os.fstat(handle.fileno()).st_nlink == 0
+
+def stored_timestamps(stored, buffer, default):
+    """Returns a timestamp per buffer row: the one stored for that record, or default.
+
+    stored yields (operation, result, timestamp) in store order. Rows are matched
+    by operation and result, newest first, so duplicates keep their timestamps in order.
+    """
+    by_record = {}
+    for operation, result, timestamp in stored:
+        by_record.setdefault((operation, repr(result)), []).append(timestamp)
+    timestamps = [default] * len(buffer)
+    for index in range(len(buffer) - 1, -1, -1):
+        matches = by_record.get((buffer.operations[index], repr(buffer.results[index])))
+        if matches:
+            timestamps[index] = matches.pop()
+    return timestamps
+
+def chunked(rows, chunk_size):
+    """Groups an iterable of rows into lists of at most chunk_size."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def create_backend(name, path, fsync_policy='never'):
+    """Returns the history backend registered under name."""
+    name = name.strip().lower()
+    if name == 'csv':
+        from app.history_backends.csv_backend import CSVBackend
+        return CSVBackend(path, fsync_policy)
+    if name == 'binary':
+        from app.history_backends.binary_backend import BinaryBackend
+        return BinaryBackend(path, fsync_policy)
+    if name == 'sqlite':
+        from app.history_backends.sqlite_backend import SQLiteBackend
+        return SQLiteBackend(path, fsync_policy)
+    raise ValueError(f"Unknown history backend: {name}")
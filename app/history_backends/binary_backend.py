@@ -0,0 +1,216 @@
+import os
+import re
+import sys
+import time
+from array import array
+from app.history_backends import HistoryBackend, replace_file, stored_timestamps
+from app.history_buffer import HistoryBuffer
+
+MAGIC = b'CALCHIS1'
+HEADER_SIZE = len(MAGIC)
+# a (float64), opcode (uint8), b (float64), result (float64), timestamp (float64), packed
+RECORD_SIZE = 33
+OPCODES = {'+': 1, '-': 2, '*': 3, '/': 4}
+SYMBOLS = {code: symbol for symbol, code in OPCODES.items()}
+# Opcode 0: the operation is free text kept in the sidecar file, a = byte offset and b = length
+TEXT_OPCODE = 0
+OPERATION_PATTERN = re.compile(r'^(\S+) ([-+*/]) (\S+)$')
+
+def record_dtype():
+    """Returns the NumPy dtype of one fixed-size history record."""
+    import numpy as np
+    return np.dtype([('a', '<f8'), ('opcode', 'u1'), ('b', '<f8'), ('result', '<f8'), ('timestamp', '<f8')])
+
+def parse_operation(operation):
+    """Splits 'a op b' into (a, opcode, b), or returns None if it cannot be stored as numbers exactly."""
+    match = OPERATION_PATTERN.match(str(operation))
+    if not match:
+        return None
+    try:
+        a, b = float(match[1]), float(match[3])
+    except ValueError:
+        return None
+    if f"{a} {match[2]} {b}" != operation:
+        return None
+    return a, OPCODES[match[2]], b
+
+class BinaryBackend(HistoryBackend):
+    """Stores history as fixed-size binary records that are memory-mapped for loading."""
+
+    def __init__(self, path, fsync_policy='never'):
+        super().__init__(path, fsync_policy)
+        self.text_path = f"{path}.ops"
+        self._handle = None
+        self._text_handle = None
+        # Number of records this process has loaded or written
+        self.synced_count = 0
+
+    def count(self):
+        """Returns the number of records in the file."""
+        if not self.exists():
+            return 0
+        return max(os.path.getsize(self.path) - HEADER_SIZE, 0) // RECORD_SIZE
+
+    def records(self):
+        """Returns a read-only, zero-copy NumPy view of every record."""
+        import numpy as np
+        if self.exists() and os.path.getsize(self.path) > 0:
+            with open(self.path, 'rb') as history:
+                if history.read(HEADER_SIZE) != MAGIC:
+                    raise ValueError(f"{self.path} is not a binary history file.")
+        count = self.count()
+        if count == 0:
+            return np.empty(0, dtype=record_dtype())
+        return np.memmap(self.path, dtype=record_dtype(), mode='r', offset=HEADER_SIZE, shape=(count,))
+
+    def _operations(self, records):
+        texts = b''
+        if (records['opcode'] == TEXT_OPCODE).any():
+            with open(self.text_path, 'rb') as text_file:
+                texts = text_file.read()
+        operations = []
+        for a, opcode, b in zip(records['a'].tolist(), records['opcode'].tolist(), records['b'].tolist()):
+            if opcode == TEXT_OPCODE:
+                operations.append(texts[int(a):int(a) + int(b)].decode('utf-8'))
+            else:
+                operations.append(f"{a} {SYMBOLS[opcode]} {b}")
+        return operations
+
+    def load(self):
+        import numpy as np
+        records = self.records()
+        results = array('d')
+        results.frombytes(np.ascontiguousarray(records['result']).tobytes())
+        self.synced_count = len(records)
+        self.mark_synced()
+        return HistoryBuffer(self._operations(records), results)
+
+    def read_appended(self):
+        # Records are fixed-size, so the new ones start right after the last synced record
+        count = self.count()
+        if self.replaced(self.signature()) or self.synced_count is None or count < self.synced_count:
+            return None
+        rows = [row for chunk in self.iter_rows(self.synced_count) for row in chunk]
+        self.synced_count = count
+        self.mark_synced()
+        return rows
+
+    def iter_rows(self, offset=0, limit=None, chunk_size=1000):
+        # Slicing the memory map only touches the pages for the requested records
+        records = self.records()
+        stop = len(records) if limit is None else min(offset + limit, len(records))
+        for start in range(offset, stop, chunk_size):
+            chunk = records[start:min(start + chunk_size, stop)]
+            yield list(zip(self._operations(chunk), chunk['result'].tolist()))
+
+    def _encode(self, rows, text_offset, timestamp):
+        import numpy as np
+        encoded, texts = [], []
+        for operation, result in rows:
+            parsed = parse_operation(operation)
+            if parsed is None:
+                data = str(operation).encode('utf-8')
+                parsed = (text_offset, TEXT_OPCODE, len(data))
+                text_offset += len(data)
+                texts.append(data)
+            encoded.append((*parsed, result, timestamp))
+        return np.array(encoded, dtype=record_dtype()), b''.join(texts)
+
+    def _text_size(self):
+        return os.path.getsize(self.text_path) if os.path.exists(self.text_path) else 0
+
+    def append(self, rows):
+        self.close_if_replaced(self._handle, self._text_handle)
+        records, texts = self._encode(rows, self._text_size(), time.time())
+        if texts:
+            if self._text_handle is None:
+                self._text_handle = open(self.text_path, 'ab')
+            self._text_handle.write(texts)
+            self._sync(self._text_handle)
+        if self._handle is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._handle = open(self.path, 'ab')
+            if self._handle.tell() == 0:
+                self._handle.write(MAGIC)
+
+        def write():
+            self._handle.write(records.tobytes())
+            self._sync(self._handle)
+        self.synced_count = self.append_at_tail(self._handle, self.synced_count, self.count, write)
+
+    def _sync(self, handle):
+        handle.flush()
+        if self.fsync_policy == 'always':
+            os.fsync(handle.fileno())
+
+    def _stored_rows(self):
+        records = self.records() if self.exists() else []
+        if not len(records):
+            return []
+        return zip(self._operations(records), records['result'].tolist(), records['timestamp'].tolist())
+
+    def rewrite(self, buffer):
+        self.close()
+        # Surviving records keep the time they were first stored
+        timestamps = stored_timestamps(self._stored_rows(), buffer, time.time())
+        records, texts = self._encode(zip(buffer.operations, buffer.results), 0, 0.0)
+        if len(records):
+            records['timestamp'] = timestamps
+        fsync = self.fsync_policy == 'always'
+        replace_file(self.text_path, lambda text_file: text_file.write(texts), 'wb', fsync)
+        self._replace_records(records)
+        self.synced_count = len(records)
+        self.mark_synced()
+
+    def compact(self, positions, buffer):
+        # Records are fixed-size, so survivors are copied as they are, which keeps their
+        # original timestamps; the operation texts they point at stay where they were
+        import numpy as np
+        self.close()
+        count = self.count()
+        if count != len(buffer) + len(positions):
+            self.rewrite(buffer)
+            return
+        keep = np.ones(count, dtype=bool)
+        keep[list(positions)] = False
+        self._replace_records(np.array(self.records()[keep]))
+        self.synced_count = len(buffer)
+        self.mark_synced()
+
+    def drop_head(self, count, buffer):
+        # Survivors are copied as they are, like in compact
+        self.close()
+        if self.count() != len(buffer) + count:
+            self.rewrite(buffer)
+            return
+        import numpy as np
+        self._replace_records(np.array(self.records()[count:]))
+        self.synced_count = len(buffer)
+        self.mark_synced()
+
+    def _replace_records(self, records):
+        def write(history):
+            history.write(MAGIC)
+            history.write(records.tobytes())
+        replace_file(self.path, write, 'wb', self.fsync_policy == 'always')
+
+    def close(self):
+        for handle in (self._handle, self._text_handle):
+            if handle is not None:
+                handle.close()
+        self._handle = None
+        self._text_handle = None
+
+def convert_csv_to_binary(csv_path, binary_path):
+    """Converts an existing CSV history into the binary format and returns the record count."""
+    from app.history_backends.csv_backend import CSVBackend
+    buffer = CSVBackend(csv_path).load()
+    BinaryBackend(binary_path).rewrite(buffer)
+    return len(buffer)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m app.history_backends.binary_backend <history.csv> <history.bin>")
+        sys.exit(1)
+    converted = convert_csv_to_binary(os.path.abspath(sys.argv[1]), os.path.abspath(sys.argv[2]))
+    print(f"Converted {converted} records to {sys.argv[2]}.")
@@ -0,0 +1,134 @@
+import csv
+import io
+import itertools
+import os
+from app.history_backends import HistoryBackend, chunked, replace_file
+from app.history_buffer import HistoryBuffer
+
+# Bytes read per step when scanning backwards for the last rows
+TAIL_BLOCK_SIZE = 64 * 1024
+
+def parse_row(row):
+    """Converts a CSV row into an (operation, result) pair."""
+    try:
+        return row[0], float(row[1])
+    except (IndexError, ValueError):
+        return row[0], float('nan')
+
+class CSVBackend(HistoryBackend):
+    """Stores history as an Operation,Result CSV that new rows are appended to."""
+
+    def __init__(self, path, fsync_policy='never'):
+        super().__init__(path, fsync_policy)
+        self._append_handle = None
+        # Byte offset up to which the file has been read or written by this process
+        self.offset = 0
+
+    def load(self):
+        # pandas is imported on first use so plain startup does not pay for it
+        import pandas as pd
+        synced = self.signature()
+        buffer = HistoryBuffer.from_frame(pd.read_csv(self.path))
+        self.synced = synced
+        self.identity = synced[0] if synced is not None else None
+        # If the file grew while it was parsed, the offset is unknown and the next refresh reloads it
+        self.offset = synced[1] if synced is not None and self.signature() == synced else None
+        return buffer
+
+    def read_appended(self):
+        # Only the bytes past the last offset are parsed, so a grown file costs as much as its new rows
+        synced = self.signature()
+        if self.replaced(synced) or self.offset is None or synced[1] < self.offset:
+            return None
+        with open(self.path, 'rb') as history:
+            history.seek(self.offset)
+            data = history.read(synced[1] - self.offset)
+        # A row another process is still writing has no newline yet and is left for the next read
+        end = data.rfind(b'\n') + 1
+        rows = [row for row in csv.reader(io.StringIO(data[:end].decode('utf-8'))) if row]
+        if self.offset == 0 and rows[:1] == [HistoryBuffer.COLUMNS]:
+            rows = rows[1:]
+        self.offset += end
+        self.synced = synced if end == len(data) else None
+        return [parse_row(row) for row in rows]
+
+    def iter_rows(self, offset=0, limit=None, chunk_size=1000):
+        # Stream with the csv module so only one chunk is held in memory at a time
+        with open(self.path, newline='', encoding='utf-8') as history:
+            reader = csv.reader(history)
+            next(reader, None)
+            stop = None if limit is None else offset + limit
+            yield from chunked((parse_row(row) for row in itertools.islice(reader, offset, stop) if row), chunk_size)
+
+    def iter_tail(self, count, chunk_size=1000):
+        with open(self.path, newline='', encoding='utf-8') as history:
+            history.seek(self._tail_start(count))
+            yield from chunked((parse_row(row) for row in csv.reader(history) if row), chunk_size)
+
+    def _tail_start(self, count):
+        """Returns the byte offset of the count-th last row, scanning backwards from the end of the file."""
+        with open(self.path, 'rb') as history:
+            header_end = len(history.readline())
+            end = history.seek(0, os.SEEK_END)
+            if count <= 0:
+                return end
+            position, found = end, 0
+            while position > header_end:
+                read_from = max(position - TAIL_BLOCK_SIZE, header_end)
+                history.seek(read_from)
+                data = history.read(position - read_from)
+                index = len(data)
+                while True:
+                    index = data.rfind(b'\n', 0, index)
+                    if index < 0:
+                        break
+                    # A newline at the very end terminates the last row rather than starting one
+                    if read_from + index >= end - 1:
+                        continue
+                    found += 1
+                    if found == count:
+                        return read_from + index + 1
+                position = read_from
+            return header_end
+
+    def append(self, rows):
+        handle = self._open_append_handle()
+
+        def write():
+            csv.writer(handle).writerows(rows)
+            handle.flush()
+            if self.fsync_policy == 'always':
+                os.fsync(handle.fileno())
+        self.offset = self.append_at_tail(handle, self.offset, lambda: os.fstat(handle.fileno()).st_size, write)
+
+    def _open_append_handle(self):
+        self.close_if_replaced(self._append_handle)
+        if self._append_handle is None or self._append_handle.closed:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            self._append_handle = open(self.path, 'a', newline='', encoding='utf-8')
+            if size == 0:
+                csv.writer(self._append_handle).writerow(HistoryBuffer.COLUMNS)
+            elif not self._ends_with_newline():
+                self._append_handle.write('\n')
+        return self._append_handle
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as history:
+            history.seek(-1, os.SEEK_END)
+            return history.read(1) == b'\n'
+
+    def rewrite(self, buffer):
+        # Full rewrites are reserved for compaction, segment rolls and clear; drop the append handle first
+        self.close()
+        replace_file(self.path, lambda handle: buffer.to_frame().to_csv(handle, index=False),
+                     fsync=self.fsync_policy == 'always', newline='', encoding='utf-8')
+        self.mark_synced()
+        self.offset = self.synced[1] if self.synced is not None else None
+
+    def close(self):
+        if self._append_handle is not None and not self._append_handle.closed:
+            if self.fsync_policy == 'always':
+                os.fsync(self._append_handle.fileno())
+            self._append_handle.close()
+        self._append_handle = None
@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import time
+from app.history_backends import HistoryBackend, stored_timestamps
+from app.history_buffer import HistoryBuffer
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS history ("
+    "id INTEGER PRIMARY KEY, operation TEXT NOT NULL, result REAL, created REAL)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+)
+INSERT = "INSERT INTO history (operation, result, created) VALUES (?, ?, ?)"
+# Every rewrite or compaction bumps the generation, so other processes never mistake it for an append
+BUMP_GENERATION = ("INSERT OR REPLACE INTO meta (key, value) VALUES "
+                   "('generation', coalesce((SELECT value FROM meta WHERE key = 'generation'), 0) + 1)")
+
+class SQLiteBackend(HistoryBackend):
+    """Stores history in a SQLite table keyed by row id so paging and compaction avoid full rewrites."""
+
+    def __init__(self, path, fsync_policy='never'):
+        super().__init__(path, fsync_policy)
+        self._connection = None
+        # Row ids in history order, so a position maps to its row without an OFFSET scan
+        self._ids = None
+        # Set when another process inserted before this one, so the in-memory copy must be reloaded
+        self.stale = False
+        # Generation of the table as of this backend's last load or write
+        self.generation = None
+
+    def connection(self):
+        """Opens the database on first use in WAL mode and creates the schema."""
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            synchronous = 'FULL' if self.fsync_policy == 'always' else 'NORMAL'
+            self._connection.execute(f"PRAGMA synchronous={synchronous}")
+            with self._connection:
+                for statement in SCHEMA:
+                    self._connection.execute(statement)
+        return self._connection
+
+    def ids(self):
+        """Returns the row ids in history order."""
+        if self._ids is None:
+            self._ids = [row[0] for row in self.connection().execute("SELECT id FROM history ORDER BY id")]
+        return self._ids
+
+    def signature(self):
+        # data_version only moves when another connection commits, so it catches other processes' writes
+        if not self.exists():
+            return None
+        return self.connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def mark_synced(self):
+        self.synced = self.signature()
+
+    def current_generation(self):
+        row = self.connection().execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def load(self):
+        self.mark_synced()
+        self.stale = False
+        self.generation = self.current_generation()
+        rows = self.connection().execute("SELECT id, operation, result FROM history ORDER BY id").fetchall()
+        self._ids = [row[0] for row in rows]
+        return HistoryBuffer([row[1] for row in rows], [row[2] for row in rows])
+
+    def read_appended(self):
+        if self.stale or self.current_generation() != self.generation:
+            return None
+        ids = self.ids()
+        last = ids[-1] if ids else 0
+        connection = self.connection()
+        self.mark_synced()
+        # Anything removed below the last known id means the table was rewritten
+        if connection.execute("SELECT count(*) FROM history WHERE id <= ?", (last,)).fetchone()[0] != len(ids):
+            return None
+        rows = connection.execute("SELECT id, operation, result FROM history WHERE id > ? ORDER BY id", (last,)).fetchall()
+        ids.extend(row[0] for row in rows)
+        return [(row[1], row[2]) for row in rows]
+
+    def append(self, rows):
+        # Callers hold the history file lock, so nobody else writes between this check and the insert
+        if self.changed():
+            # Another process inserted rows, so the cached ids no longer cover the table
+            self._ids = None
+            self.stale = True
+        ids = self.ids()
+        connection = self.connection()
+        created = time.time()
+        # One transaction per batch; the INSERT is prepared once and reused for every row
+        with connection:
+            cursor = connection.cursor()
+            for operation, result in rows:
+                cursor.execute(INSERT, (operation, result, created))
+                ids.append(cursor.lastrowid)
+        if not self.stale:
+            self.mark_synced()
+
+    def rewrite(self, buffer):
+        connection = self.connection()
+        with connection:
+            # Surviving rows keep the time they were first stored
+            stored = connection.execute("SELECT operation, result, created FROM history ORDER BY id").fetchall()
+            created = stored_timestamps(stored, buffer, time.time())
+            connection.execute("DELETE FROM history")
+            connection.executemany(INSERT, zip(buffer.operations, buffer.results, created))
+            connection.execute(BUMP_GENERATION)
+        self._ids = None
+        self.stale = False
+        self.generation = self.current_generation()
+        self.mark_synced()
+
+    def compact(self, positions, buffer):
+        ids = self.ids()
+        if len(ids) != len(buffer) + len(positions):
+            self.rewrite(buffer)
+            return
+        # Each tombstoned position is one primary-key DELETE; nothing else is rewritten
+        with self.connection() as connection:
+            connection.executemany("DELETE FROM history WHERE id = ?", ((ids[index],) for index in positions))
+            connection.execute(BUMP_GENERATION)
+        self.generation = self.current_generation()
+        self.mark_synced()
+        dead = set(positions)
+        self._ids = [row_id for index, row_id in enumerate(ids) if index not in dead]
+
+    def drop_head(self, count, buffer):
+        ids = self.ids()
+        if len(ids) != len(buffer) + count:
+            self.rewrite(buffer)
+            return
+        if not count:
+            return
+        # Ids grow with history order, so the oldest records go in one range DELETE
+        with self.connection() as connection:
+            connection.execute("DELETE FROM history WHERE id <= ?", (ids[count - 1],))
+            connection.execute(BUMP_GENERATION)
+        self.generation = self.current_generation()
+        self.mark_synced()
+        self._ids = ids[count:]
+
+    def count(self):
+        return len(self.ids())
+
+    def iter_rows(self, offset=0, limit=None, chunk_size=1000):
+        stop = self.count() if limit is None else min(offset + limit, self.count())
+        for start in range(offset, stop, chunk_size):
+            yield self.page(start, min(chunk_size, stop - start))
+
+    def page(self, offset, limit):
+        """Returns up to limit (operation, result) rows starting at position offset."""
+        ids = self.ids()
+        if offset >= len(ids) or limit <= 0:
+            return []
+        return self.connection().execute(
+            "SELECT operation, result FROM history WHERE id >= ? ORDER BY id LIMIT ?",
+            (ids[max(offset, 0)], limit)).fetchall()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = None
@@ -0,0 +1,54 @@
+from array import array
+
+class HistoryBuffer:
+    """Columnar, append-friendly store for calculation records.
+
+    Operations live in a list and results in a float64 array; both grow
+    geometrically, so appending N records is amortized O(N) overall. A
+    DataFrame is only built on request through to_frame().
+    """
+
+    COLUMNS = ['Operation', 'Result']
+
+    def __init__(self, operations=(), results=()):
+        self.operations = list(operations)
+        self.results = array('d', results)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Builds a buffer from a DataFrame with Operation and Result columns."""
+        if frame.empty:
+            return cls()
+        import pandas as pd
+        results = pd.to_numeric(frame['Result'], errors='coerce')
+        return cls(frame['Operation'].astype(str).tolist(), results.tolist())
+
+    def __len__(self):
+        return len(self.operations)
+
+    def append(self, operation, result):
+        """Adds one record to the end of the buffer."""
+        self.operations.append(operation)
+        self.results.append(result)
+
+    def extend(self, operations, results):
+        """Adds many records to the end of the buffer."""
+        self.operations.extend(operations)
+        self.results.extend(results)
+
+    def compact(self, deleted):
+        """Drops the records at the positions in deleted in a single pass."""
+        self.operations = [operation for index, operation in enumerate(self.operations) if index not in deleted]
+        self.results = array('d', (result for index, result in enumerate(self.results) if index not in deleted))
+
+    def clear(self):
+        """Removes every record."""
+        self.operations = []
+        self.results = array('d')
+
+    def to_frame(self):
+        """Materializes the buffer as a DataFrame."""
+        import pandas as pd
+        return pd.DataFrame({'Operation': pd.Series(self.operations, dtype=object),
+                             'Result': pd.Series(self.results, dtype='float64')},
+                            columns=self.COLUMNS)
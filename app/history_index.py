@@ -0,0 +1,126 @@
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from app.history_stats import operation_type
+
+# New positions wait in a small unsorted tail; it is merged into the sorted index once it grows past this
+MERGE_THRESHOLD = 4096
+
+def operands_of(operation):
+    """Returns the numeric operands of an 'a op b ...' record, or () for expressions."""
+    if operation_type(operation) == 'eval':
+        return ()
+    try:
+        return tuple(float(token) for token in operation.split(' ')[::2])
+    except ValueError:
+        return ()
+
+def record_matches(text, result, operation=None, operand=None, low=None, high=None):
+    """Checks one record against the find filters."""
+    return ((operation is None or operation_type(text) == operation)
+            and (operand is None or operand in operands_of(text))
+            and (low is None or result >= low)
+            and (high is None or result <= high))
+
+class HistoryIndex:
+    """Search indexes over history positions.
+
+    Positions are kept in an array sorted by result for bisect range lookups,
+    and in one ascending posting list per operation type. An operand index is
+    only built on the first operand search. Tombstoned positions stay in the
+    indexes and are filtered out at query time; compaction rebuilds them.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.by_result = array('q')
+        self.unsorted = []
+        self.postings = {}
+        self.by_operand = None
+        self.rebuild(buffer)
+
+    def rebuild(self, buffer):
+        """Re-indexes every position of buffer, e.g. after compaction renumbered them."""
+        self.buffer = buffer
+        results = buffer.results
+        # NaN results cannot be ordered and never fall in a range, so they are left out
+        self.by_result = array('q', sorted((position for position in range(len(buffer))
+                                            if not math.isnan(results[position])), key=results.__getitem__))
+        self.unsorted = []
+        self.postings = {}
+        for position, operation in enumerate(buffer.operations):
+            self._post(position, operation)
+        self.by_operand = None
+
+    def _post(self, position, operation):
+        postings = self.postings.get(operation_type(operation))
+        if postings is None:
+            postings = self.postings[operation_type(operation)] = array('q')
+        postings.append(position)
+
+    def add(self, start):
+        """Indexes the positions appended to the buffer from start onwards."""
+        operations = self.buffer.operations
+        for position in range(start, len(operations)):
+            self._post(position, operations[position])
+            if self.by_operand is not None:
+                for operand in set(operands_of(operations[position])):
+                    self.by_operand.setdefault(operand, array('q')).append(position)
+        results = self.buffer.results
+        self.unsorted.extend(position for position in range(start, len(operations)) if not math.isnan(results[position]))
+        if len(self.unsorted) > MERGE_THRESHOLD:
+            self._merge()
+
+    def _merge(self):
+        results = self.buffer.results
+        self.unsorted.sort(key=results.__getitem__)
+        merged = list(self.by_result)
+        merged.extend(self.unsorted)
+        # Two sorted runs: Timsort merges them in linear time
+        merged.sort(key=results.__getitem__)
+        self.by_result = array('q', merged)
+        self.unsorted = []
+
+    def result_range(self, low=None, high=None):
+        """Positions whose result lies in [low, high], in no particular order."""
+        results = self.buffer.results.__getitem__
+        start = 0 if low is None else bisect_left(self.by_result, low, key=results)
+        stop = len(self.by_result) if high is None else bisect_right(self.by_result, high, key=results)
+        matches = list(self.by_result[start:stop])
+        matches.extend(position for position in self.unsorted
+                       if (low is None or results(position) >= low) and (high is None or results(position) <= high))
+        return matches
+
+    def result_range_size(self, low=None, high=None):
+        results = self.buffer.results.__getitem__
+        start = 0 if low is None else bisect_left(self.by_result, low, key=results)
+        stop = len(self.by_result) if high is None else bisect_right(self.by_result, high, key=results)
+        return stop - start + len(self.unsorted)
+
+    def operation(self, op_type):
+        return self.postings.get(op_type, array('q'))
+
+    def operand(self, value):
+        if self.by_operand is None:
+            self.by_operand = {}
+            for position, operation in enumerate(self.buffer.operations):
+                for operand in set(operands_of(operation)):
+                    self.by_operand.setdefault(operand, array('q')).append(position)
+        return self.by_operand.get(value, array('q'))
+
+    def find(self, operation=None, operand=None, low=None, high=None):
+        """Returns the ascending positions matching every given filter."""
+        candidates = []
+        if operation is not None:
+            candidates.append((len(self.operation(operation)), lambda: self.operation(operation)))
+        if operand is not None:
+            candidates.append((len(self.operand(operand)), lambda: self.operand(operand)))
+        if low is not None or high is not None:
+            candidates.append((self.result_range_size(low, high), lambda: self.result_range(low, high)))
+        if not candidates:
+            return list(range(len(self.buffer)))
+        # Walk the most selective index and check the remaining filters per record
+        positions = min(candidates, key=lambda candidate: candidate[0])[1]()
+        operations, results = self.buffer.operations, self.buffer.results
+        return sorted(position for position in positions
+                      if record_matches(operations[position], results[position], operation, operand, low, high))
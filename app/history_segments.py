@@ -0,0 +1,137 @@
+import csv
+import gzip
+import json
+import logging
+import lzma
+import math
+import os
+import shutil
+from itertools import islice
+from app.history_backends import chunked
+from app.history_backends.csv_backend import parse_row
+from app.history_index import record_matches
+from app.history_stats import operation_type
+
+COMPRESSORS = {'gzip': ('.csv.gz', gzip.open), 'lzma': ('.csv.xz', lzma.open)}
+MANIFEST = 'segments.json'
+
+class SegmentArchive:
+    """Read-only, compressed CSV segments holding the oldest history records.
+
+    A manifest lists the segments in order with a small zone map for each
+    (record count, result range, operation types) so searches can skip
+    segments that cannot match without decompressing them.
+    """
+
+    def __init__(self, directory, compression='gzip'):
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Unknown history segment compression: {compression}")
+        self.directory = directory
+        self.compression = compression
+        self.segments = self.load_manifest()
+
+    def load_manifest(self):
+        try:
+            with open(os.path.join(self.directory, MANIFEST), encoding='utf-8') as manifest_file:
+                return json.load(manifest_file)['segments']
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError, KeyError) as e:
+            logging.error(f"Unreadable history segment manifest in '{self.directory}': {e}")
+            return []
+
+    def save_manifest(self):
+        path = os.path.join(self.directory, MANIFEST)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as manifest_file:
+            json.dump({'segments': self.segments}, manifest_file, indent=1)
+        os.replace(f"{path}.tmp", path)
+
+    @property
+    def count(self):
+        """Number of archived records."""
+        return sum(segment['records'] for segment in self.segments)
+
+    def roll(self, operations, results):
+        """Writes the records to a new segment and adds it to the manifest."""
+        if not operations:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        extension, opener = COMPRESSORS[self.compression]
+        name = f"segment-{len(self.segments) + 1:06d}{extension}"
+        with opener(os.path.join(self.directory, name), 'wt', encoding='utf-8', newline='') as segment_file:
+            writer = csv.writer(segment_file)
+            writer.writerow(['Operation', 'Result'])
+            writer.writerows(zip(operations, results))
+        ordered = [result for result in results if not math.isnan(result)]
+        self.segments.append({
+            'file': name,
+            'records': len(operations),
+            'low': min(ordered, default=None),
+            'high': max(ordered, default=None),
+            'types': sorted({operation_type(operation) for operation in operations}),
+            'last': results[-1],
+        })
+        # The manifest is only updated once the segment is complete
+        self.save_manifest()
+
+    def read(self, segment):
+        """Yields the (operation, result) rows of one segment."""
+        opener = gzip.open if segment['file'].endswith('.gz') else lzma.open
+        with opener(os.path.join(self.directory, segment['file']), 'rt', encoding='utf-8', newline='') as segment_file:
+            reader = csv.reader(segment_file)
+            next(reader, None)
+            for row in reader:
+                yield parse_row(row)
+
+    def rows(self):
+        """Yields every archived row, oldest first."""
+        for segment in self.segments:
+            yield from self.read(segment)
+
+    def iter_rows(self, offset=0, limit=None, chunk_size=1000):
+        """Yields chunks of archived rows from archive position offset, skipping whole segments before it."""
+        start, remaining = 0, limit
+        for segment in self.segments:
+            end = start + segment['records']
+            if end > offset and remaining != 0:
+                skip = max(0, offset - start)
+                stop = None if remaining is None else skip + remaining
+                for chunk in chunked(islice(self.read(segment), skip, stop), chunk_size):
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+            start = end
+
+    def find(self, operation=None, operand=None, low=None, high=None):
+        """Yields (archive position, operation, result) for matching rows, oldest first."""
+        start = 0
+        for segment in self.segments:
+            if not self.may_match(segment, operation, low, high):
+                start += segment['records']
+                continue
+            for position, (text, result) in enumerate(self.read(segment), start):
+                if record_matches(text, result, operation, operand, low, high):
+                    yield position, text, result
+            start += segment['records']
+
+    @staticmethod
+    def may_match(segment, operation, low, high):
+        """Uses the zone map to rule a segment out without reading it."""
+        if operation is not None and operation not in segment['types']:
+            return False
+        if low is None and high is None:
+            return True
+        if segment['low'] is None:
+            return False
+        return (low is None or segment['high'] >= low) and (high is None or segment['low'] <= high)
+
+    def last_result(self):
+        """Result of the newest archived record; raises KeyError when the archive is empty."""
+        if not self.segments:
+            raise KeyError('ans')
+        return self.segments[-1]['last']
+
+    def clear(self):
+        """Deletes every segment."""
+        self.segments = []
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,187 @@
+import json
+import logging
+import math
+import os
+
+STATS_VERSION = 1
+OPERATION_TYPES = {'+': 'add', '-': 'subtract', '*': 'multiply', '/': 'divide'}
+
+def operation_type(operation):
+    """Classifies a history record as add/subtract/multiply/divide, or eval for anything else."""
+    tokens = operation.split(' ')
+    symbols = set(tokens[1::2])
+    if len(tokens) >= 3 and len(tokens) % 2 == 1 and len(symbols) == 1:
+        return OPERATION_TYPES.get(symbols.pop(), 'eval')
+    return 'eval'
+
+class RunningStats:
+    """Count, compensated sum, Welford mean/variance and min/max of a stream of results.
+
+    The mean is taken from the compensated sum, so it stays accurate when
+    large values cancel out; the sum of squared deviations follows Welford.
+
+    Values can be removed again; when a removed value was the minimum or
+    maximum the extremes are marked stale and rescanned on the next query.
+    """
+
+    FIELDS = ('count', 'total', 'compensation', 'm2', 'minimum', 'maximum', 'stale')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.compensation = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.stale = False
+
+    def _accumulate(self, value):
+        # Neumaier summation: keep the low-order bits each addition would lose
+        total = self.total + value
+        if math.isfinite(total):
+            if abs(self.total) >= abs(value):
+                self.compensation += (self.total - total) + value
+            else:
+                self.compensation += (value - total) + self.total
+        self.total = total
+
+    def add(self, value):
+        previous_mean = self.mean
+        self.count += 1
+        self._accumulate(value)
+        self.m2 += (value - previous_mean) * (value - self.mean)
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def remove(self, value):
+        if self.count <= 1:
+            self.__init__()
+            return
+        previous_mean = self.mean
+        self.count -= 1
+        self._accumulate(-value)
+        # Welford's update run backwards
+        self.m2 = max(self.m2 - (value - previous_mean) * (value - self.mean), 0.0)
+        if value <= self.minimum or value >= self.maximum:
+            self.stale = True
+
+    def rescan_extremes(self, values):
+        """Recomputes min/max from the live values after a removed extreme."""
+        self.minimum = min(values, default=math.inf)
+        self.maximum = max(values, default=-math.inf)
+        self.stale = False
+
+    @property
+    def sum(self):
+        return self.total + self.compensation if math.isfinite(self.total) else self.total
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def variance(self):
+        """Sample variance, 0.0 for fewer than two values."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @classmethod
+    def merged(cls, parts):
+        """Combines several aggregates into one (Chan et al. parallel variance)."""
+        combined = cls()
+        for part in parts:
+            if not part.count:
+                continue
+            count = combined.count + part.count
+            delta = part.mean - combined.mean
+            combined.m2 += part.m2 + delta * delta * combined.count * part.count / count
+            combined.count = count
+            combined._accumulate(part.total)
+            combined._accumulate(part.compensation)
+            combined.minimum = min(combined.minimum, part.minimum)
+            combined.maximum = max(combined.maximum, part.maximum)
+        return combined
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        for field in cls.FIELDS:
+            setattr(stats, field, data[field])
+        return stats
+
+class HistoryStats:
+    """Running aggregates per operation type, kept in step with the history records."""
+
+    def __init__(self):
+        self.by_type = {}
+
+    def add(self, operation, result):
+        op_type = operation_type(operation)
+        stats = self.by_type.get(op_type)
+        if stats is None:
+            stats = self.by_type[op_type] = RunningStats()
+        stats.add(result)
+
+    def add_many(self, operations, results):
+        for operation, result in zip(operations, results):
+            self.add(operation, result)
+
+    def remove(self, operation, result):
+        stats = self.by_type.get(operation_type(operation))
+        if stats is not None:
+            stats.remove(result)
+            if not stats.count:
+                del self.by_type[operation_type(operation)]
+
+    def clear(self):
+        self.by_type = {}
+
+    @classmethod
+    def rebuild(cls, buffer, deleted, archived_rows=()):
+        """Computes the aggregates from scratch over the archived and live records."""
+        history_stats = cls()
+        for operation, result in archived_rows:
+            history_stats.add(operation, result)
+        for index, (operation, result) in enumerate(zip(buffer.operations, buffer.results)):
+            if index not in deleted:
+                history_stats.add(operation, result)
+        return history_stats
+
+    @staticmethod
+    def fingerprint(history_file, buffer, deleted):
+        """Identifies the history state the aggregates describe."""
+        try:
+            size = os.path.getsize(history_file)
+        except OSError:
+            size = 0
+        return {'records': len(buffer), 'deleted': len(deleted), 'size': size}
+
+    def save(self, path, fingerprint):
+        data = {'version': STATS_VERSION, **fingerprint,
+                'stats': {op_type: stats.to_dict() for op_type, stats in self.by_type.items()}}
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as stats_file:
+            json.dump(data, stats_file)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """Returns the saved aggregates, or None when missing or describing a different history."""
+        try:
+            with open(path, encoding='utf-8') as stats_file:
+                data = json.load(stats_file)
+            if data.get('version') != STATS_VERSION or any(data.get(key) != value
+                                                           for key, value in fingerprint.items()):
+                return None
+            history_stats = cls()
+            history_stats.by_type = {op_type: RunningStats.from_dict(stats) for op_type, stats in data['stats'].items()}
+            return history_stats
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable history stats '{path}': {e}")
+            return None
@@ -0,0 +1,180 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+PHASES = ('parse', 'compute', 'persist', 'log', 'total')
+# Latency bucket upper bounds in seconds, 1us to 10s on a 1-2.5-5 scale
+BUCKETS = tuple(scale * 10.0 ** exponent for exponent in range(-6, 1) for scale in (1, 2.5, 5)) + (10.0,)
+_context = threading.local()
+
+class Histogram:
+    """Fixed-bucket latency histogram; recording is one bisect and a few additions."""
+
+    __slots__ = ('counts', 'count', 'wall_sum', 'cpu_sum', 'wall_max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.wall_sum = 0.0
+        self.cpu_sum = 0.0
+        self.wall_max = 0.0
+
+    def record(self, wall, cpu):
+        self.counts[bisect_left(BUCKETS, wall)] += 1
+        self.count += 1
+        self.wall_sum += wall
+        self.cpu_sum += cpu
+        self.wall_max = max(self.wall_max, wall)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of observations."""
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return BUCKETS[index] if index < len(BUCKETS) else self.wall_max
+        return 0.0
+
+class CommandMetrics:
+    """Per-command, per-phase wall and CPU time histograms shared by the whole process."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(CommandMetrics, cls).__new__(cls)
+                    instance.initialize()
+                    cls._instance = instance
+        return cls._instance
+
+    def initialize(self):
+        # METRICS_ENABLED=false makes every timer a no-op
+        self.enabled = os.environ.get('METRICS_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def record(self, command, phase, wall, cpu):
+        key = (command, phase)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.record(wall, cpu)
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+    def summary(self):
+        """Rows of (command, phase, count, mean wall, mean cpu, p50, p95, p99), times in seconds."""
+        with self.lock:
+            items = sorted(self.histograms.items(), key=lambda item: (item[0][0], PHASES.index(item[0][1])))
+            return [(command, phase, histogram.count, histogram.wall_sum / histogram.count,
+                     histogram.cpu_sum / histogram.count, histogram.percentile(0.5),
+                     histogram.percentile(0.95), histogram.percentile(0.99))
+                    for (command, phase), histogram in items]
+
+    def render_prometheus(self):
+        """Formats the histograms in the Prometheus text exposition format."""
+        lines = ["# HELP calculator_command_seconds Wall time spent per command phase.",
+                 "# TYPE calculator_command_seconds histogram"]
+        cpu_lines = ["# HELP calculator_command_cpu_seconds_total CPU time spent per command phase.",
+                     "# TYPE calculator_command_cpu_seconds_total counter"]
+        with self.lock:
+            for (command, phase), histogram in sorted(self.histograms.items()):
+                labels = f'command="{command}",phase="{phase}"'
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'calculator_command_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                lines.append(f'calculator_command_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'calculator_command_seconds_sum{{{labels}}} {histogram.wall_sum!r}')
+                lines.append(f'calculator_command_seconds_count{{{labels}}} {histogram.count}')
+                cpu_lines.append(f'calculator_command_cpu_seconds_total{{{labels}}} {histogram.cpu_sum!r}')
+        return "\n".join(lines + cpu_lines) + "\n"
+
+    def dump(self, path):
+        """Writes the Prometheus text atomically so scrapers never see a partial file."""
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as metrics_file:
+            metrics_file.write(self.render_prometheus())
+        os.replace(temporary_path, path)
+
+class timed:
+    """Adds the time spent in a block to a phase of the command running on this thread.
+
+    Outside a command (e.g. in batch worker processes) or with metrics
+    disabled it only costs an attribute lookup.
+    """
+
+    __slots__ = ('phase', 'phases', 'wall', 'cpu')
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.phases = getattr(_context, 'phases', None)
+        if self.phases is not None:
+            self.wall = time.perf_counter()
+            self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.phases is not None:
+            wall, cpu = self.phases.get(self.phase, (0.0, 0.0))
+            self.phases[self.phase] = (wall + time.perf_counter() - self.wall, cpu + time.thread_time() - self.cpu)
+        return False
+
+def begin_command(command):
+    """Starts collecting phase timings for a command on this thread."""
+    if CommandMetrics().enabled:
+        _context.command = command
+        _context.phases = {}
+
+def end_command():
+    """Records one observation per phase for the command begun on this thread."""
+    phases = getattr(_context, 'phases', None)
+    if phases is None:
+        return
+    _context.phases = None
+    metrics = CommandMetrics()
+    for phase, (wall, cpu) in phases.items():
+        metrics.record(_context.command, phase, wall, cpu)
+
+class PeriodicDump:
+    """Background thread that rewrites the Prometheus text file every interval seconds."""
+
+    def __init__(self, path, interval):
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='metrics-dump', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            CommandMetrics().dump(self.path)
+        except OSError as e:
+            logging.warning(f"Could not write metrics to {self.path}: {e}")
+
+    def stop(self):
+        """Stops the thread and writes a final snapshot; safe to call twice."""
+        if not self.stopped.is_set():
+            self.stopped.set()
+            self.write()
+            atexit.unregister(self.stop)
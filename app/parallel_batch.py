@@ -0,0 +1,85 @@
+import importlib
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from app.calculation_history import CalculationHistory
+
+# Commands whose result depends only on their own operands, so workers can evaluate them
+PARALLEL_COMMANDS = {
+    'add': ('app.plugins.add', 'AddCommand'),
+    'subtract': ('app.plugins.subtract', 'SubtractCommand'),
+    'multiply': ('app.plugins.multiply', 'MultiplyCommand'),
+    'divide': ('app.plugins.divide', 'DivideCommand'),
+}
+_calculators = {}
+
+def calculator(command_name):
+    """Returns the plugin's calculate function, importing the plugin on first use."""
+    if command_name not in _calculators:
+        module_name, class_name = PARALLEL_COMMANDS[command_name]
+        _calculators[command_name] = getattr(importlib.import_module(module_name), class_name).calculate
+    return _calculators[command_name]
+
+def evaluate_shard(commands):
+    """Worker entry point: maps (command_name, args) pairs to (expression, result), or None to defer."""
+    results = []
+    for command_name, args in commands:
+        operands = args.split()
+        try:
+            results.append(calculator(command_name)(operands) if len(operands) >= 2 else None)
+        except (ValueError, ZeroDivisionError):
+            # Usage and error paths run in the parent through the real plugin so messages and logs match
+            results.append(None)
+    return results
+
+def shards(commands, size):
+    """Groups command lines into lists of (input_command, command_name, args)."""
+    commands = iter(commands)
+    while shard := list(islice(commands, size)):
+        yield [(input_command, *split_command(input_command)) for input_command in shard]
+
+def split_command(input_command):
+    command_parts = input_command.split(maxsplit=1)
+    return command_parts[0].lower(), command_parts[1] if len(command_parts) > 1 else ""
+
+def run_parallel(commands, execute_line, jobs):
+    """Yields (input_command, succeeded) in input order while workers evaluate shards ahead.
+
+    Arithmetic commands are computed in a process pool; everything else
+    (history commands, eval, unknown commands, invalid arguments) goes to
+    execute_line in this process at its original position, after every
+    earlier result has been printed and recorded.
+    """
+    shard_size = int(os.environ.get('PARALLEL_SHARD_SIZE', '2000'))
+    history = CalculationHistory()
+    pending = deque()
+    shard_iterator = shards(commands, shard_size)
+
+    def submit(pool):
+        for shard in islice(shard_iterator, 1):
+            work = [(command_name, args) for _, command_name, args in shard if command_name in PARALLEL_COMMANDS]
+            pending.append((shard, pool.submit(evaluate_shard, work)))
+
+    pool = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        # Keep every worker busy with one shard in hand and one queued
+        for _ in range(jobs * 2):
+            submit(pool)
+        while pending:
+            shard, future = pending.popleft()
+            submit(pool)
+            results = iter(future.result())
+            for input_command, command_name, _ in shard:
+                evaluated = next(results) if command_name in PARALLEL_COMMANDS else None
+                if evaluated is None:
+                    yield input_command, execute_line(input_command)
+                    continue
+                expression, result = evaluated
+                print(f"{expression} = {result}")
+                history.add_record(expression, result)
+                yield input_command, True
+            logging.debug(f"Merged a shard of {len(shard)} commands.")
+    finally:
+        pool.shutdown(cancel_futures=True)
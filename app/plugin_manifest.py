@@ -0,0 +1,54 @@
+import json
+import logging
+import os
+import pkgutil
+
+MANIFEST_VERSION = 1
+
+def directory_mtimes(directories):
+    """Returns the modification times of the plugin directories and their sub-directories."""
+    mtimes = {}
+    for path, _ in directories:
+        if not os.path.isdir(path):
+            continue
+        mtimes[path] = os.stat(path).st_mtime_ns
+        for entry in os.scandir(path):
+            if entry.is_dir() and entry.name != '__pycache__':
+                mtimes[entry.path] = entry.stat().st_mtime_ns
+    return mtimes
+
+def scan_plugins(directories):
+    """Lists the plugins in each directory without importing them."""
+    plugins = []
+    for path, package in directories:
+        if not os.path.exists(path):
+            logging.warning(f"Directory '{path}' not found.")
+            continue
+        for _, plugin_name, _ in pkgutil.iter_modules([path]):
+            plugins.append({
+                'name': plugin_name,
+                'module': f'{package}.{plugin_name}',
+                'class': f'{plugin_name.capitalize()}Command',
+            })
+    return plugins
+
+def load_manifest(manifest_path, directories):
+    """Returns the cached plugin list, rebuilding it when any plugin directory has changed."""
+    mtimes = directory_mtimes(directories)
+    try:
+        with open(manifest_path, encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest.get('version') == MANIFEST_VERSION and manifest.get('mtimes') == mtimes:
+            return manifest['plugins']
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    plugins = scan_plugins(directories)
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+        with open(manifest_path, 'w', encoding='utf-8') as manifest_file:
+            json.dump({'version': MANIFEST_VERSION, 'mtimes': mtimes, 'plugins': plugins}, manifest_file, indent=2)
+        logging.info(f"Plugin manifest rebuilt with {len(plugins)} plugins.")
+    except OSError as e:
+        logging.warning(f"Could not write plugin manifest '{manifest_path}': {e}")
+    return plugins
@@ -1,30 +1,42 @@
 import logging
+from app.arithmetic import exact_sum
 from app.commands import Command
 from app.calculation_history import CalculationHistory
+from app.metrics import timed
+from app.result_cache import ResultCache
 
 class AddCommand(Command):
+    @staticmethod
+    def calculate(operands):
+        with timed('parse'):
+            values = [float(operand) for operand in operands]
+        with timed('compute'):
+            return " + ".join(map(str, values)), exact_sum(values)
+
     def execute(self, args):
         args_list = args.split()
         
         if not args:
             logging.warning("Add command invoked without arguments.")
-            print("Usage: add <number1> <number2>")
-            return
+            print("Usage: add <number1> <number2> [<number3> ...]")
+            return False
         
-        if len(args_list) != 2:
-            logging.warning("Add command requires exactly two arguments.")
-            print("Usage: add <number1> <number2>")
-            return
+        if len(args_list) < 2:
+            logging.warning("Add command requires at least two arguments.")
+            print("Usage: add <number1> <number2> [<number3> ...]")
+            return False
 
         try:
-            a, b = map(float, args_list)
-            result = a + b
-            print(f"{a} + {b} = {result}")
+            expression, result = ResultCache().lookup('add', args_list, self.calculate)
+            print(f"{expression} = {result}")
             # Log the operation before attempting to record it in history
-            logging.debug(f"Recording addition to history: {a} + {b} = {result}")
-            CalculationHistory().add_record(f"{a} + {b}", result)
-            logging.info(f"Addition operation recorded successfully: {a} + {b} = {result}")
+            logging.debug(f"Recording addition to history: {expression} = {result}")
+            with timed('persist'):
+                CalculationHistory().add_record(expression, result)
+            with timed('log'):
+                logging.info(f"Addition operation recorded successfully: {expression} = {result}")
 
         except ValueError:
             logging.error("Add command received invalid arguments.", exc_info=True)
-            print("Error: Please provide two numbers separated by a space.")
+            print("Error: Please provide two or more numbers separated by spaces.")
+            return False
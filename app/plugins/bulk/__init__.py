@@ -0,0 +1,84 @@
+import csv
+import os
+import logging
+from app.commands import Command
+from app.calculation_history import CalculationHistory
+from app.metrics import timed
+
+# Operation name -> (history symbol, NumPy ufunc name); NumPy is imported on first use
+OPERATIONS = {
+    'add': ('+', 'add'),
+    'subtract': ('-', 'subtract'),
+    'multiply': ('*', 'multiply'),
+    'divide': ('/', 'divide'),
+}
+
+def has_header(input_file):
+    """Tells whether the first row of the input names its columns instead of holding operands."""
+    with open(input_file, newline='', encoding='utf-8') as source:
+        first_row = next(csv.reader(source), [])[:2]
+    try:
+        [float(value) for value in first_row]
+    except ValueError:
+        return True
+    return False
+
+class BulkCommand(Command):
+    def execute(self, args):
+        args_list = args.split()
+
+        if len(args_list) != 3 or args_list[0].lower() not in OPERATIONS:
+            logging.warning("Bulk command invoked with invalid arguments.")
+            print("Usage: bulk <add|subtract|multiply|divide> <input.csv> <output.csv>")
+            return False
+
+        operation, input_file, output_file = args_list[0].lower(), args_list[1], args_list[2]
+        if not os.path.exists(input_file):
+            logging.warning(f"Bulk input file not found: {input_file}")
+            print(f"Error: Input file '{input_file}' does not exist.")
+            return False
+
+        import numpy as np
+        import pandas as pd
+
+        chunk_size = int(os.getenv('BULK_CHUNK_SIZE', '100000'))
+        symbol, ufunc_name = OPERATIONS[operation]
+        function = getattr(np, ufunc_name)
+        operations, results = [], []
+        processed = skipped = 0
+
+        try:
+            # Operands are the first two columns of the input file; a header row is optional
+            header = 0 if has_header(input_file) else None
+            for chunk_number, chunk in enumerate(pd.read_csv(input_file, header=header, usecols=[0, 1],
+                                                             chunksize=chunk_size)):
+                a = chunk.iloc[:, 0].to_numpy(dtype='float64')
+                b = chunk.iloc[:, 1].to_numpy(dtype='float64')
+                result = np.full(len(a), np.nan)
+                # Same rule as DivideCommand: rows dividing by zero are not computed or recorded
+                valid = b != 0 if operation == 'divide' else np.ones(len(a), dtype=bool)
+                function(a, b, out=result, where=valid)
+
+                pd.DataFrame({'a': a, 'b': b, 'result': result}).to_csv(
+                    output_file, mode='w' if chunk_number == 0 else 'a', header=chunk_number == 0, index=False)
+
+                a_text = pd.Series(a[valid]).astype(str)
+                b_text = pd.Series(b[valid]).astype(str)
+                operations.extend((a_text + f" {symbol} " + b_text).tolist())
+                results.extend(result[valid].tolist())
+                processed += len(a)
+                skipped += int((~valid).sum())
+        except ValueError:
+            logging.error("Bulk command received non-numeric operands.", exc_info=True)
+            print("Error: The first two columns of the input file must be numeric.")
+            return False
+
+        # One batched history write instead of a record per row
+        with timed('persist'):
+            CalculationHistory().add_records(operations, results)
+        if skipped:
+            logging.warning(f"Bulk {operation} skipped {skipped} rows dividing by zero.")
+            print(f"Skipped {skipped} rows: Division by zero is not allowed.")
+        print(f"Bulk {operation}: {processed} rows written to {output_file}, "
+              f"{processed - skipped} computed and recorded.")
+        logging.info(f"Bulk {operation} recorded {processed - skipped} results from {input_file} to {output_file}.")
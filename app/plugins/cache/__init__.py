@@ -0,0 +1,23 @@
+import logging
+from app.commands import Command
+from app.result_cache import ResultCache
+
+class CacheCommand(Command):
+    def execute(self, args=None):
+        action = (args or "").strip().lower()
+        cache = ResultCache()
+
+        if action == 'stats':
+            stats = cache.stats()
+            logging.info(f"Result cache stats requested: {stats}")
+            print(f"Result cache: {stats['size']}/{stats['max_size']} entries")
+            print(f"Hits: {stats['hits']}, misses: {stats['misses']}, evictions: {stats['evictions']}")
+            print(f"Hit rate: {stats['hit_rate']:.1%}")
+        elif action == 'clear':
+            cache.clear()
+            logging.info("Result cache cleared.")
+            print("Result cache cleared.")
+        else:
+            logging.warning("Cache command invoked with invalid arguments.")
+            print("Usage: cache <stats|clear>")
+            return False
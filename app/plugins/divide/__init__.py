@@ -1,34 +1,50 @@
 import logging
+import operator
+from functools import reduce
 from app.commands import Command
 from app.calculation_history import CalculationHistory
+from app.metrics import timed
+from app.result_cache import ResultCache
 
 class DivideCommand(Command):
+    @staticmethod
+    def calculate(operands):
+        with timed('parse'):
+            values = [float(operand) for operand in operands]
+        with timed('compute'):
+            # Raises ZeroDivisionError, so a zero divisor is never cached
+            if 0 in values[1:]:
+                raise ZeroDivisionError("float division by zero")
+            return " / ".join(map(str, values)), reduce(operator.truediv, values)
+
     def execute(self, args):
         args_list = args.split()
         
         if not args:
             logging.warning("Divide command invoked without arguments.")
-            print("Usage: divide <number1> <number2>")
-            return
+            print("Usage: divide <number1> <number2> [<number3> ...]")
+            return False
         
-        if len(args_list) != 2:
-            logging.warning("Divide command requires exactly two arguments.")
-            print("Usage: divide <number1> <number2>")
-            return
+        if len(args_list) < 2:
+            logging.warning("Divide command requires at least two arguments.")
+            print("Usage: divide <number1> <number2> [<number3> ...]")
+            return False
 
         try:
-            a, b = map(float, args_list)
-            if b == 0:
-                logging.warning("Attempted division by zero.")
-                print("Error: Division by zero is not allowed.")
-                return
+            expression, result = ResultCache().lookup('divide', args_list, self.calculate)
+            print(f"{expression} = {result}")
+            logging.debug(f"Recording division to history: {expression} = {result}")
+            with timed('persist'):
+                CalculationHistory().add_record(expression, result)
+            with timed('log'):
+                logging.info(f"Division operation recorded successfully: {expression} = {result}")
 
-            result = a / b
-            print(f"{a} / {b} = {result}")
-            logging.debug(f"Recording division to history: {a} / {b} = {result}")
-            CalculationHistory().add_record(f"{a} / {b}", result)
-            logging.info(f"Division operation recorded successfully: {a} / {b} = {result}")
+        except ZeroDivisionError:
+            logging.warning("Attempted division by zero.")
+            print("Error: Division by zero is not allowed.")
+            return False
 
         except ValueError:
             logging.error("Divide command received invalid arguments.")
-            print("Error: Please provide two numbers separated by a space.")
+            print("Error: Please provide two or more numbers separated by spaces.")
+            return False
@@ -0,0 +1,44 @@
+import logging
+from app.commands import Command
+from app.calculation_history import CalculationHistory
+from app.expression import ExpressionError, compile_expression
+from app.metrics import timed
+
+class EvalCommand(Command):
+    def execute(self, args):
+        if not args or not args.strip():
+            logging.warning("Eval command invoked without an expression.")
+            print("Usage: eval <expression>   e.g. eval (3 + 4) * 2 / 7")
+            return False
+
+        history = CalculationHistory()
+        try:
+            with timed('parse'):
+                expression = compile_expression(args.strip())
+            variables = {} if expression.is_constant else {'ans': history.last_result()}
+            with timed('compute'):
+                result = expression.evaluate(variables)
+        except ZeroDivisionError:
+            logging.warning("Attempted division by zero.")
+            print("Error: Division by zero is not allowed.")
+            return False
+        except OverflowError:
+            logging.warning("Eval command overflowed.")
+            print("Error: The result is too large.")
+            return False
+        except KeyError:
+            logging.warning("Eval command used 'ans' without a previous result.")
+            print("Error: 'ans' needs a previous result in the history.")
+            return False
+        except ExpressionError as e:
+            logging.error(f"Eval command received an invalid expression: {e}")
+            print(f"Error: {e}")
+            return False
+
+        print(f"{expression.source} = {result}")
+        # The whole expression is one history record, however many operators it has
+        logging.debug(f"Recording expression to history: {expression.source} = {result}")
+        with timed('persist'):
+            history.add_record(expression.source, result)
+        with timed('log'):
+            logging.info(f"Expression operation recorded successfully: {expression.source} = {result}")
@@ -7,12 +7,19 @@ class ClearCommand(Command):
         # Initial log indicating the intention to clear history
         logging.info("User initiated calculation history clear operation.")
         
-        # Confirm with the user before proceeding to clear the history
-        confirmation = input("Are you sure you want to clear the entire calculation history? (yes/no): ").strip().lower()
-        if confirmation != 'yes':
-            print("Clear history operation cancelled.")
-            logging.info("Clear history operation was cancelled by the user.")
-            return
+        option = (args or "").strip()
+        if option not in ('', '--yes'):
+            logging.warning("Clear command invoked with invalid arguments.")
+            print("Usage: clear [--yes]")
+            return False
+
+        # Confirm with the user before proceeding to clear the history; --yes confirms up front
+        if option != '--yes':
+            confirmation = input("Are you sure you want to clear the entire calculation history? (yes/no): ").strip().lower()
+            if confirmation != 'yes':
+                print("Clear history operation cancelled.")
+                logging.info("Clear history operation was cancelled by the user.")
+                return
 
         # Instantiate CalculationHistory
         history = CalculationHistory()
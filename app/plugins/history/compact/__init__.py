@@ -0,0 +1,15 @@
+import logging
+from app.commands import Command
+from app.calculation_history import CalculationHistory
+
+class CompactCommand(Command):
+    def execute(self, args=None):
+        logging.info("User initiated calculation history compaction.")
+        history = CalculationHistory()
+
+        # Physically remove tombstoned records from the store
+        removed = history.compact_history()
+        if removed:
+            print(f"History compacted: {removed} deleted records removed.")
+        else:
+            print("Nothing to compact.")
@@ -8,7 +8,7 @@ class DeleteCommand(Command):
         if not args.strip().isdigit():
             logging.error("Delete command requires a numerical index as an argument.")
             print("Error: Please provide a valid numerical index for the history record you wish to delete.")
-            return
+            return False
 
         # Convert the argument to an integer
         index = int(args.strip())
@@ -26,3 +26,4 @@ class DeleteCommand(Command):
         else:
             # In case of failure, log a warning. Assuming delete_history() handles its error messages internally
             logging.warning(f"Failed to delete calculation history record at index: {index}.")
+            return False
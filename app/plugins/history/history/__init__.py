@@ -0,0 +1,77 @@
+import logging
+import math
+from app.commands import Command
+from app.calculation_history import CalculationHistory
+from app.history_stats import OPERATION_TYPES, RunningStats
+
+USAGE = ("Usage: history stats [<operation>]\n"
+         "       history find [--op <operation>] [--operand X] [--min X] [--max X] [--limit N]")
+FIND_LIMIT = 100
+
+def parse_find(args):
+    """Turns '--op add --min 10 --limit 5' into find() keyword arguments plus a display limit."""
+    tokens = (args or "").split()
+    if not tokens or len(tokens) % 2:
+        raise ValueError("Find needs at least one filter, and every option needs a value.")
+    filters, limit = {}, FIND_LIMIT
+    for flag, value in zip(tokens[::2], tokens[1::2]):
+        if flag == '--op':
+            if value.lower() not in (*OPERATION_TYPES.values(), 'eval'):
+                raise ValueError(f"Unknown operation: {value}")
+            filters['operation'] = value.lower()
+        elif flag in ('--operand', '--min', '--max'):
+            filters[{'--operand': 'operand', '--min': 'low', '--max': 'high'}[flag]] = float(value)
+        elif flag == '--limit' and value.isdigit() and int(value) > 0:
+            limit = int(value)
+        else:
+            raise ValueError(f"Invalid find option: {flag} {value}")
+    return filters, limit
+
+class HistoryCommand(Command):
+    def execute(self, args=None):
+        subcommand, _, rest = (args or "").strip().partition(' ')
+
+        if subcommand.lower() == 'stats':
+            self.show_stats(rest.strip().lower())
+        elif subcommand.lower() == 'find':
+            return self.find(rest)
+        else:
+            logging.warning("History command invoked with invalid arguments.")
+            print(USAGE)
+            return False
+
+    def show_stats(self, operation):
+        statistics = CalculationHistory().statistics()
+        logging.info(f"History stats requested for {operation or 'all operations'}.")
+        if operation:
+            if operation not in statistics:
+                print(f"No history records for operation '{operation}'.")
+                return
+            rows = [(operation, statistics[operation])]
+        else:
+            if not statistics:
+                print("History is empty.")
+                return
+            rows = sorted(statistics.items()) + [('all', RunningStats.merged(statistics.values()))]
+        print(f"{'Operation':<10} {'Count':>8} {'Sum':>14} {'Mean':>14} {'Std dev':>14} {'Min':>14} {'Max':>14}")
+        for name, stats in rows:
+            print(f"{name:<10} {stats.count:>8} {stats.sum:>14.6g} {stats.mean:>14.6g} "
+                  f"{math.sqrt(stats.variance):>14.6g} {stats.minimum:>14.6g} {stats.maximum:>14.6g}")
+
+    def find(self, args):
+        try:
+            filters, limit = parse_find(args)
+        except ValueError as e:
+            logging.warning(f"History find received invalid arguments: {e}")
+            print(USAGE)
+            return False
+        matches = CalculationHistory().find(**filters)
+        logging.info(f"History find {filters} matched {len(matches)} records.")
+        if not matches:
+            print("No matching records.")
+            return
+        print(f"{'Index':>6}  {'Operation':<24}  Result")
+        print("\n".join(f"{index:>6}  {operation:<24}  {result}" for index, operation, result in matches[:limit]))
+        if len(matches) > limit:
+            print(f"Showing {limit} of {len(matches)} matches; use --limit N to see more.")
+
@@ -3,14 +3,37 @@ import logging
 from app.commands import Command
 from app.calculation_history import CalculationHistory  # Ensure the import is maintained
 
+USAGE = "Usage: load [--tail N | --offset N] [--limit N]"
+
+def parse_paging(args):
+    """Turns '--tail 50' or '--offset 1000 --limit 100' into load_history keyword arguments."""
+    tokens = (args or "").split()
+    if len(tokens) % 2:
+        raise ValueError("Paging options need a value.")
+    options = {}
+    for flag, value in zip(tokens[::2], tokens[1::2]):
+        if flag not in ('--tail', '--offset', '--limit') or not value.isdigit():
+            raise ValueError(f"Invalid paging option: {flag} {value}")
+        options[flag[2:]] = int(value)
+    if 'tail' in options and ('offset' in options or 'limit' in options):
+        raise ValueError("--tail cannot be combined with --offset or --limit.")
+    return options
+
 class LoadCommand(Command):
     def execute(self, args=None):
+        try:
+            paging = parse_paging(args)
+        except ValueError as e:
+            logging.warning(f"Load command received invalid arguments: {e}")
+            print(USAGE)
+            return False
+
         logging.info("Attempting to load calculation history.")
     
         history = CalculationHistory()
     
         try:
-            result = history.load_history()
+            result = history.load_history(**paging)
             if result is True:  # Assuming True indicates history was found and displayed
                 logging.info("Calculation history loaded and displayed successfully.")
             elif result is False:  # False indicates the history is empty but was successfully accessed
@@ -18,4 +41,4 @@ class LoadCommand(Command):
         except Exception as e:  # Consider catching more specific exceptions
             logging.error(f"An error occurred while trying to load the calculation history: {e}")
             print("An error occurred while trying to load the calculation history.")
-
+            return False
@@ -0,0 +1,38 @@
+import logging
+from app.commands import Command
+from app.profiling import save_profile
+
+USAGE = "Usage: profile start | profile stop [<file.pstats>]"
+
+class ProfileCommand(Command):
+    def __init__(self, command_handler):
+        self.command_handler = command_handler
+
+    def execute(self, args=None):
+        action, _, path = (args or "").strip().partition(' ')
+        action = action.lower()
+
+        if action == 'start':
+            if not self.command_handler.start_profiling():
+                print("Profiling is already running.")
+                return False
+            logging.info("Command profiling started.")
+            print("Profiling started. Run 'profile stop [file]' to save the results.")
+        elif action == 'stop':
+            profiler = self.command_handler.stop_profiling()
+            if profiler is None:
+                print("Profiling is not running. Use 'profile start' first.")
+                return False
+            try:
+                path, summary_path, summary = save_profile(profiler, path.strip() or None)
+            except OSError as e:
+                logging.error(f"Could not write profile: {e}")
+                print(f"Error: Could not write profile: {e}")
+                return False
+            logging.info(f"Command profile written to {path} and {summary_path}.")
+            print(summary.rstrip())
+            print(f"Profile written to {path} (summary in {summary_path}).")
+        else:
+            logging.warning("Profile command invoked with invalid arguments.")
+            print(USAGE)
+            return False
@@ -0,0 +1,41 @@
+import logging
+import os
+from app.commands import Command
+from app.metrics import CommandMetrics
+
+USAGE = "Usage: stats [reset | dump [<file>]]"
+
+class StatsCommand(Command):
+    def execute(self, args=None):
+        action, _, path = (args or "").strip().partition(' ')
+        metrics = CommandMetrics()
+
+        if not action:
+            rows = metrics.summary()
+            logging.info(f"Command latency stats requested for {len(rows)} command phases.")
+            if not rows:
+                print("No commands have been timed yet.")
+                return
+            print(f"{'Command':<10} {'Phase':<8} {'Count':>8} {'Mean us':>10} {'CPU us':>10} "
+                  f"{'p50 us':>10} {'p95 us':>10} {'p99 us':>10}")
+            for command, phase, count, wall, cpu, p50, p95, p99 in rows:
+                print(f"{command:<10} {phase:<8} {count:>8} {wall * 1e6:>10.1f} {cpu * 1e6:>10.1f} "
+                      f"{p50 * 1e6:>10.1f} {p95 * 1e6:>10.1f} {p99 * 1e6:>10.1f}")
+        elif action.lower() == 'reset':
+            metrics.reset()
+            logging.info("Command latency stats reset.")
+            print("Command latency stats reset.")
+        elif action.lower() == 'dump':
+            path = path.strip() or os.environ.get('METRICS_DUMP_PATH', 'data/metrics.prom')
+            try:
+                metrics.dump(path)
+            except OSError as e:
+                logging.error(f"Could not write metrics to {path}: {e}")
+                print(f"Error: Could not write metrics to {path}.")
+                return False
+            logging.info(f"Command latency stats written to {path}.")
+            print(f"Metrics written to {path}.")
+        else:
+            logging.warning("Stats command invoked with invalid arguments.")
+            print(USAGE)
+            return False
@@ -1,35 +1,49 @@
 import sys
 import logging
+from app.arithmetic import exact_sum
 from app.commands import Command
 from app.calculation_history import CalculationHistory
+from app.metrics import timed
+from app.result_cache import ResultCache
 
 class SubtractCommand(Command):
+    @staticmethod
+    def calculate(operands):
+        with timed('parse'):
+            values = [float(operand) for operand in operands]
+        with timed('compute'):
+            # a - b - c ... as one exactly rounded sum of a, -b, -c, ...
+            result = exact_sum([values[0]] + [-value for value in values[1:]])
+            return " - ".join(map(str, values)), result
+
     def execute(self, args):
         args_list = args.split()
 
         # Check if any arguments were provided
         if not args:
             logging.warning("Subtract command invoked without arguments.")
-            print("Usage: subtract <number1> <number2>")
-            return
+            print("Usage: subtract <number1> <number2> [<number3> ...]")
+            return False
         
-        # Ensure exactly two arguments are provided
-        if len(args_list) != 2:
-            logging.warning("Subtract command requires exactly two arguments.")
-            print("Usage: subtract <number1> <number2>")
-            return
+        # Ensure at least two arguments are provided
+        if len(args_list) < 2:
+            logging.warning("Subtract command requires at least two arguments.")
+            print("Usage: subtract <number1> <number2> [<number3> ...]")
+            return False
 
         try:
-            # Convert arguments to float and attempt subtraction
-            a, b = map(float, args_list)
-            result = a - b
-            print(f"{a} - {b} = {result}")
+            # Convert arguments to float and subtract them in one pass, reusing a cached result when possible
+            expression, result = ResultCache().lookup('subtract', args_list, self.calculate)
+            print(f"{expression} = {result}")
             
             # Log the operation before attempting to record it in history
-            logging.debug(f"Recording subtraction to history: {a} - {b} = {result}")
-            CalculationHistory().add_record(f"{a} - {b}", result)
-            logging.info(f"Subtraction operation recorded successfully: {a} - {b} = {result}")
+            logging.debug(f"Recording subtraction to history: {expression} = {result}")
+            with timed('persist'):
+                CalculationHistory().add_record(expression, result)
+            with timed('log'):
+                logging.info(f"Subtraction operation recorded successfully: {expression} = {result}")
 
         except ValueError:
             logging.error("Subtract command received invalid arguments.", exc_info=True)
-            print("Error: Please provide two numbers separated by a space.")
+            print("Error: Please provide two or more numbers separated by spaces.")
+            return False
@@ -0,0 +1,27 @@
+import io
+import os
+import pstats
+import time
+
+def default_profile_path():
+    """Returns a timestamped .pstats path in PROFILE_DIR (default data/)."""
+    return os.path.join(os.environ.get('PROFILE_DIR', 'data'), f"profile-{time.strftime('%Y%m%d-%H%M%S')}.pstats")
+
+def save_profile(profiler, path=None, top_n=None):
+    """Writes profiler stats to path plus a top-N text summary beside it; returns (path, summary_path, summary)."""
+    path = path or default_profile_path()
+    top_n = top_n or int(os.environ.get('PROFILE_TOP_N', '20'))
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    profiler.dump_stats(path)
+    if profiler.stats:
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).strip_dirs().sort_stats('cumulative').print_stats(top_n)
+        summary = stream.getvalue()
+    else:
+        summary = "No commands were profiled.\n"
+    summary_path = f"{os.path.splitext(path)[0]}.txt"
+    with open(summary_path, 'w', encoding='utf-8') as summary_file:
+        summary_file.write(summary)
+    return path, summary_path, summary
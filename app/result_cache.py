@@ -0,0 +1,70 @@
+import os
+import threading
+from collections import OrderedDict
+
+class ResultCache:
+    """Bounded LRU cache of arithmetic results shared by the calculator plugins."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(ResultCache, cls).__new__(cls)
+                    instance.initialize()
+                    cls._instance = instance
+        return cls._instance
+
+    def initialize(self):
+        # RESULT_CACHE_SIZE=0 turns caching off
+        self.max_size = int(os.environ.get('RESULT_CACHE_SIZE', '1024'))
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def lookup(self, operation, operands, calculate):
+        """Returns (expression, result) for the operand strings, calling calculate(operands) on a miss."""
+        key = (operation, tuple(operands))
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        # Compute outside the lock; a racing miss on the same key just stores the same entry twice
+        entry = calculate(operands)
+        if self.max_size > 0:
+            with self.lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                if len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return entry
+
+    def stats(self):
+        """Returns the cache counters and hit rate."""
+        with self.lock:
+            return self._stats()
+
+    def _stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        """Empties the cache and resets its counters."""
+        with self.lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,163 @@
+import asyncio
+import contextlib
+import io
+import json
+import logging
+from app.calculation_history import CalculationHistory
+
+# Commands a network client may run; the rest stop the server, wait for console input
+# or read and write files on the server's host
+NETWORK_COMMANDS = ('add', 'subtract', 'multiply', 'divide', 'eval', 'load', 'history', 'cache', 'stats')
+# Served only without arguments ('stats dump <file>' writes a file)
+NO_ARGUMENT_COMMANDS = ('stats',)
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+class CalculatorServer:
+    """Serves the command handler over a TCP line protocol and a minimal HTTP JSON endpoint."""
+
+    def __init__(self, command_handler, commit_window=0.05):
+        self.command_handler = command_handler
+        self.commit_window = commit_window
+        self.history = CalculationHistory()
+        self.servers = []
+        self._writer_task = None
+        # Futures of commands waiting for the next commit, and whether one is being written
+        self._waiters = []
+        self._committing = False
+        self.requests = 0
+
+    def dispatch(self, input_command):
+        """Runs one command line and returns (succeeded, captured output)."""
+        command_parts = input_command.split(maxsplit=1)
+        command_name = command_parts[0].lower()
+        args = command_parts[1] if len(command_parts) > 1 else ""
+        self.requests += 1
+        if command_name not in NETWORK_COMMANDS or (args and command_name in NO_ARGUMENT_COMMANDS):
+            return False, f"Command '{input_command}' is not available over the network.\n"
+        # Commands run synchronously on the event loop, so redirecting stdout cannot interleave
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            succeeded = self.command_handler.execute_command(command_name, args)
+        return succeeded, output.getvalue()
+
+    async def run(self, input_command):
+        """Runs one command line and answers only once any history it recorded is stored."""
+        succeeded, output = self.dispatch(input_command)
+        # Rows recorded by this command are either pending or in the commit being written;
+        # the next commit to start finishes after both
+        if self.history.has_pending or self._committing:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            if not await waiter:
+                return False, output + "Error: The history could not be saved.\n"
+        return succeeded, output
+
+    async def handle_line_client(self, reader, writer):
+        """Answers each command line with one JSON line: {"ok": ..., "output": ...}."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                input_command = line.decode('utf-8', errors='replace').strip()
+                if not input_command:
+                    continue
+                if input_command.lower() in ('exit', 'quit'):
+                    break
+                succeeded, output = await self.run(input_command)
+                writer.write((json.dumps({'ok': succeeded, 'output': output}) + '\n').encode('utf-8'))
+                await writer.drain()
+        except ConnectionError:
+            logging.info("Client disconnected.")
+        finally:
+            writer.close()
+
+    async def handle_http_client(self, reader, writer):
+        """Serves POST /command with a JSON body of the form {"command": "add 1 2"}."""
+        status, payload = 400, {'ok': False, 'output': "Bad request.\n"}
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                header = (await reader.readline()).decode('latin-1').strip()
+                if not header:
+                    break
+                name, _, value = header.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get('content-length', '0')))
+            if len(request_line) < 2:
+                pass
+            elif request_line[1] != '/command':
+                status, payload = 404, {'ok': False, 'output': "Not found.\n"}
+            elif request_line[0] != 'POST':
+                status, payload = 405, {'ok': False, 'output': "Use POST.\n"}
+            else:
+                command = json.loads(body or b'{}').get('command', '').strip()
+                if command:
+                    succeeded, output = await self.run(command)
+                    status, payload = 200, {'ok': succeeded, 'output': output}
+        except (ValueError, AttributeError, asyncio.IncompleteReadError):
+            logging.warning("Malformed HTTP request received.")
+        body = json.dumps(payload).encode('utf-8')
+        writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1') + body)
+        with contextlib.suppress(ConnectionError):
+            await writer.drain()
+        writer.close()
+
+    async def history_writer(self):
+        """Single writer task: every commit window, all buffered records go out in one write."""
+        while True:
+            await asyncio.sleep(self.commit_window)
+            await self.commit()
+
+    async def commit(self):
+        """Writes the pending history off the event loop, then answers the commands waiting for it."""
+        waiters, self._waiters = self._waiters, []
+        self._committing = True
+        try:
+            await asyncio.to_thread(self.history.flush)
+            stored = True
+        except OSError as e:
+            logging.error(f"Could not write history: {e}")
+            stored = False
+        except asyncio.CancelledError:
+            # Stopping: the final commit in stop() answers these commands instead
+            self._waiters[:0] = waiters
+            raise
+        finally:
+            self._committing = False
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(stored)
+
+    async def start(self, host='127.0.0.1', port=8765, http_port=None):
+        """Starts listening and the history writer; returns the asyncio servers."""
+        self.history.autoflush = False
+        self.servers = [await asyncio.start_server(self.handle_line_client, host, port)]
+        if http_port is not None:
+            self.servers.append(await asyncio.start_server(self.handle_http_client, host, http_port))
+        self._writer_task = asyncio.create_task(self.history_writer())
+        for server in self.servers:
+            logging.info(f"Serving on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+        return self.servers
+
+    async def stop(self):
+        """Stops accepting clients and commits any remaining history."""
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._writer_task
+        await self.commit()
+        self.history.autoflush = True
+
+    async def serve(self, host='127.0.0.1', port=8765, http_port=None):
+        """Runs the server until cancelled."""
+        await self.start(host, port, http_port)
+        try:
+            await asyncio.gather(*(server.serve_forever() for server in self.servers))
+        finally:
+            await self.stop()
@@ -0,0 +1,145 @@
+"""Timing, reporting and baseline comparison for the microbenchmark suite.
+
+Run with ``python -m pytest benchmarks``. Each benchmark records ops/sec and
+latency percentiles; ``--bench-save`` stores them as the baseline and later
+runs fail when a median latency regresses beyond ``--bench-threshold``.
+"""
+import contextlib
+import json
+import os
+import shutil
+import statistics
+import time
+import pytest
+from faker import Faker
+from app.calculation_history import CalculationHistory
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+HISTORY_SIZES = [10, 1_000, 100_000, pytest.param(1_000_000, marks=pytest.mark.slow)]
+OPERAND_POOL_SIZE = 10_000
+_results = {}
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmarks')
+    group.addoption('--bench-baseline', default=BASELINE_PATH, help="JSON file holding the baseline timings")
+    group.addoption('--bench-save', action='store_true', help="store this run's timings as the new baseline")
+    group.addoption('--bench-threshold', type=float, default=0.25,
+                    help="allowed slowdown of the median latency before a benchmark fails (0.25 = 25%%)")
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section("benchmarks")
+    width = max(len(name) for name in _results)
+    terminalreporter.write_line(f"{'benchmark':<{width}} {'ops/sec':>12} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10}")
+    for name, stats in _results.items():
+        terminalreporter.write_line(f"{name:<{width}} {stats['ops_per_sec']:>12.1f} {stats['p50_us']:>10.1f} "
+                                    f"{stats['p95_us']:>10.1f} {stats['p99_us']:>10.1f}")
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if not _results or not config.getoption('--bench-save', default=False):
+        return
+    path = config.getoption('--bench-baseline')
+    baseline = load_baseline(path)
+    baseline.update(_results)
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+
+def load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return {}
+
+def summarize(timings_ns):
+    """Turns per-call timings into ops/sec and latency percentiles in microseconds."""
+    timings_us = sorted(timing / 1000 for timing in timings_ns)
+    cuts = statistics.quantiles(timings_us, n=100, method='inclusive') if len(timings_us) > 1 else timings_us * 99
+    return {
+        'rounds': len(timings_us),
+        'ops_per_sec': len(timings_us) / (sum(timings_us) / 1e6) if sum(timings_us) else 0.0,
+        'mean_us': statistics.fmean(timings_us),
+        'p50_us': cuts[49],
+        'p95_us': cuts[94],
+        'p99_us': cuts[98],
+    }
+
+class Benchmark:
+    """Times repeated calls of a function and checks the median against the baseline."""
+
+    def __init__(self, name, baseline, threshold):
+        self.name = name
+        self.baseline = baseline
+        self.threshold = threshold
+
+    def __call__(self, func, rounds=1000, setup=None, warmup=1):
+        """Calls func(*setup(round)) rounds times (plus warmup calls) and returns the stats."""
+        timings = []
+        for round_number in range(-warmup, rounds):
+            args = setup(round_number) if setup else ()
+            started = time.perf_counter_ns()
+            func(*args)
+            elapsed = time.perf_counter_ns() - started
+            if round_number >= 0:
+                timings.append(elapsed)
+        stats = summarize(timings)
+        _results[self.name] = stats
+        reference = self.baseline.get(self.name)
+        if reference and stats['p50_us'] > reference['p50_us'] * (1 + self.threshold):
+            pytest.fail(f"{self.name} regressed: median {stats['p50_us']:.1f}us vs baseline "
+                        f"{reference['p50_us']:.1f}us (threshold {self.threshold:.0%})")
+        return stats
+
+@pytest.fixture(scope='session')
+def baseline(pytestconfig):
+    return load_baseline(pytestconfig.getoption('--bench-baseline'))
+
+@pytest.fixture
+def bench(request, baseline):
+    """Times a callable; see Benchmark.__call__."""
+    return Benchmark(request.node.nodeid, baseline, request.config.getoption('--bench-threshold'))
+
+@pytest.fixture(scope='session')
+def operands():
+    """A reproducible pool of Faker-generated operand strings."""
+    fake = Faker()
+    fake.seed_instance(2024)
+    return [str(fake.pyfloat(min_value=-1e6, max_value=1e6)) for _ in range(OPERAND_POOL_SIZE)]
+
+@pytest.fixture(scope='session')
+def history_files(tmp_path_factory, operands):
+    """Builds each history size once per session and returns a function that copies one out."""
+    built = {}
+    def history_path(size):
+        if size not in built:
+            path = tmp_path_factory.mktemp('histories') / f"history_{size}.csv"
+            with open(path, 'w', encoding='utf-8') as history_file:
+                history_file.write("Operation,Result\n")
+                for index in range(size):
+                    a, b = operands[index % OPERAND_POOL_SIZE], operands[(index * 7 + 1) % OPERAND_POOL_SIZE]
+                    history_file.write(f"{a} + {b},{float(a) + float(b)}\n")
+            built[size] = path
+        return built[size]
+    return history_path
+
+@pytest.fixture
+def sized_history(request, tmp_path, monkeypatch, history_files):
+    """A CalculationHistory singleton loaded with request.param rows in a private file."""
+    path = tmp_path / "history.csv"
+    shutil.copyfile(history_files(request.param), path)
+    monkeypatch.setenv("HISTORY_FILE_PATH", str(path))
+    # Measure tombstoning itself rather than the occasional compaction it triggers
+    monkeypatch.setenv("HISTORY_COMPACT_RATIO", "1.0")
+    CalculationHistory._instance = None
+    history = CalculationHistory()
+    yield history
+    history.close()
+    CalculationHistory._instance = None
+
+@pytest.fixture
+def quiet():
+    """Sends printed output to the null device while benchmarking."""
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        yield
@@ -0,0 +1,42 @@
+"""Benchmarks for command dispatch and the arithmetic plugins."""
+import pytest
+from app.commands import Command, CommandHandler
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.multiply import MultiplyCommand
+from app.plugins.subtract import SubtractCommand
+from app.result_cache import ResultCache
+
+PLUGINS = {'add': AddCommand, 'subtract': SubtractCommand, 'multiply': MultiplyCommand, 'divide': DivideCommand}
+
+class NoopCommand(Command):
+    def execute(self, args):
+        pass
+
+def operand_args(operands, round_number):
+    return f"{operands[round_number % len(operands)]} {operands[(round_number * 7 + 1) % len(operands)]}"
+
+def test_execute_command_dispatch(bench, operands):
+    """Lookup and call overhead of CommandHandler.execute_command."""
+    handler = CommandHandler()
+    handler.register_command('noop', NoopCommand())
+    bench(lambda args: handler.execute_command('noop', args), rounds=10_000,
+          setup=lambda round_number: (operand_args(operands, round_number),))
+
+@pytest.mark.parametrize('name', PLUGINS)
+def test_plugin_argument_parsing(bench, operands, name):
+    """Splitting, float conversion, computing and formatting in calculate()."""
+    calculate = PLUGINS[name].calculate
+    bench(lambda args: calculate(args.split()), rounds=10_000,
+          setup=lambda round_number: (operand_args(operands, round_number),))
+
+@pytest.mark.parametrize('sized_history', [10], indirect=True)
+@pytest.mark.parametrize('name', PLUGINS)
+def test_plugin_execute(bench, operands, monkeypatch, sized_history, quiet, name):
+    """A full uncached plugin run: parse, compute, print and record in history."""
+    monkeypatch.setenv("RESULT_CACHE_SIZE", "0")
+    ResultCache._instance = None
+    command = PLUGINS[name]()
+    sized_history.autoflush = False
+    bench(command.execute, rounds=10_000, setup=lambda round_number: (operand_args(operands, round_number),))
+    ResultCache._instance = None
@@ -0,0 +1,29 @@
+"""Benchmarks for CalculationHistory at history sizes from 10 to 1,000,000 rows."""
+import pytest
+from benchmarks.conftest import HISTORY_SIZES
+
+def rounds_for(size, most, work=1_000_000):
+    """Fewer rounds for operations whose cost grows with the history size."""
+    return max(3, min(most, work // size))
+
+@pytest.mark.parametrize('sized_history', HISTORY_SIZES, indirect=True)
+def test_add_record(bench, sized_history):
+    bench(sized_history.add_record, rounds=5_000, setup=lambda round_number: ("1.5 + 2.5", 4.0))
+
+@pytest.mark.parametrize('sized_history', HISTORY_SIZES, indirect=True)
+def test_save_history(bench, sized_history, request):
+    bench(sized_history.save_history, rounds=rounds_for(request.node.callspec.params['sized_history'], 200))
+
+@pytest.mark.parametrize('sized_history', HISTORY_SIZES, indirect=True)
+def test_load_history_tail(bench, sized_history, quiet):
+    bench(sized_history.load_history, rounds=500, setup=lambda round_number: (0, None, 100))
+
+@pytest.mark.parametrize('sized_history', HISTORY_SIZES, indirect=True)
+def test_load_history_full(bench, sized_history, quiet, request):
+    bench(sized_history.load_history, rounds=rounds_for(request.node.callspec.params['sized_history'], 200))
+
+@pytest.mark.parametrize('sized_history', HISTORY_SIZES, indirect=True)
+def test_delete_history(bench, sized_history, quiet, request):
+    size = request.node.callspec.params['sized_history']
+    bench(sized_history.delete_history, rounds=min(size // 2, 1_000), warmup=0,
+          setup=lambda round_number: (round_number,))
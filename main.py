@@ -1,8 +1,54 @@
 # main.py
-from app import App    
+import time
+STARTED = time.perf_counter()
+
+import argparse
+import atexit
+import os
+import sys
+from app import App
+IMPORTED = time.perf_counter()
+
+def parse_args(argv=None):
+    """Parses the command line options."""
+    parser = argparse.ArgumentParser(description="Calculator application")
+    parser.add_argument('--batch', nargs='?', const='-', metavar='FILE',
+                        help="run commands from FILE (or stdin) without prompting")
+    parser.add_argument('--on-error', choices=['continue', 'stop'], default='continue',
+                        help="what to do when a batch command fails")
+    parser.add_argument('--flush-interval', type=int, default=0, metavar='N',
+                        help="write history every N batch commands (0 = once at the end)")
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help="evaluate batch arithmetic in N worker processes (0 = one per CPU)")
+    parser.add_argument('--serve', action='store_true',
+                        help="serve commands over TCP (one JSON response line per command line)")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on with --serve")
+    parser.add_argument('--port', type=int, default=8765, help="TCP line-protocol port for --serve")
+    parser.add_argument('--http-port', type=int, metavar='PORT',
+                        help="also serve POST /command JSON requests on PORT")
+    parser.add_argument('--commit-window', type=float, default=0.05, metavar='SECONDS',
+                        help="how long --serve gathers history records into one write")
+    parser.add_argument('--profile', nargs='?', const='', metavar='FILE',
+                        help="profile every command with cProfile and write FILE (.pstats) plus a summary on exit")
+    parser.add_argument('--startup-profile', action='store_true',
+                        help="print how long startup took and exit")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    #App.start()
+    options = parse_args()
     app = App()  # Create an instance of the App class
+    if options.startup_profile:
+        app.prepare()
+        print(app.startup_report(IMPORTED - STARTED), file=sys.stderr)
+        sys.exit(0)
+    if options.profile is not None:
+        app.command_handler.start_profiling()
+        atexit.register(app.save_session_profile, options.profile or None)
+    if options.serve:
+        app.start_server(options.host, options.port, options.http_port, options.commit_window)
+        sys.exit(0)
+    if options.batch or not sys.stdin.isatty():
+        # Commands were piped in or a script was given, so skip the REPL
+        sys.exit(app.start_batch(options.batch or '-', options.on_error, options.flush_interval,
+                                 options.jobs or os.cpu_count() or 1))
     app.start()  # Start the app by calling the start function
-    
\ No newline at end of file
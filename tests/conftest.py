@@ -0,0 +1,15 @@
+"""Shared fixtures for the test suite."""
+import pytest
+
+from app.calculation_history import CalculationHistory
+
+@pytest.fixture
+def history_file(tmp_path, monkeypatch):
+    """Point the CalculationHistory singleton at a throwaway history file."""
+    path = tmp_path / "history.csv"
+    monkeypatch.setenv("HISTORY_FILE_PATH", str(path))
+    CalculationHistory._instance = None
+    yield path
+    if CalculationHistory._instance is not None:
+        CalculationHistory._instance.close()
+    CalculationHistory._instance = None
@@ -1,7 +1,12 @@
 
 """Tests for the app module."""
+import os
+import subprocess
+import sys
+from unittest.mock import patch
 import pytest
 from app import App
+from app.calculation_history import CalculationHistory
 
 def test_app_get_environment_variable():
     """Test whether the environment variables are fetched """
@@ -60,3 +65,146 @@ def test_app_menu_command_listing(capfd, monkeypatch):
     for command in expected_commands:
         assert command in out, f"Expected '{command}' to be listed in the menu."
         
+
+def test_app_batch_runs_commands_and_flushes_once(history_file, capsys):
+    """Test that batch mode executes every line and writes history in one flush."""
+    app = App()
+    app.prepare()
+    lines = ["add 1 2", "", "# comment", "multiply 3 4", "divide 8 2"]
+    with patch("app.calculation_history.CalculationHistory.append_records",
+               autospec=True) as mock_append:
+        exit_code = app.run_batch(lines)
+    assert exit_code == 0
+    mock_append.assert_called_once()
+    assert list(mock_append.call_args.args[1]) == [
+        ("1.0 + 2.0", 3.0), ("3.0 * 4.0", 12.0), ("8.0 / 2.0", 4.0)]
+    captured = capsys.readouterr()
+    assert "1.0 + 2.0 = 3.0" in captured.out
+    assert "8.0 / 2.0 = 4.0" in captured.out
+    assert "Processed 3 commands (0 failed)" in captured.err
+
+def test_app_batch_continue_on_error(history_file, capsys):
+    """Test that the default policy keeps going past unknown commands."""
+    app = App()
+    app.prepare()
+    exit_code = app.run_batch(["unknown_command", "add 1 1", "exit", "add 5 5"])
+    captured = capsys.readouterr()
+    assert exit_code == 0
+    assert "No such command: unknown_command" in captured.out
+    assert "1.0 + 1.0 = 2.0" in captured.out
+    assert "5.0 + 5.0" not in captured.out
+    assert "Processed 2 commands (1 failed)" in captured.err
+    assert history_file.read_text().splitlines() == ["Operation,Result", "1.0 + 1.0,2.0"]
+
+def test_app_batch_stop_on_error(history_file, capsys):
+    """Test that the stop policy halts at the first failure with a non-zero exit code."""
+    app = App()
+    app.prepare()
+    exit_code = app.run_batch(["add 1 1", "unknown_command", "add 2 2"], on_error='stop')
+    captured = capsys.readouterr()
+    assert exit_code == 1
+    assert "2.0 + 2.0" not in captured.out
+
+@pytest.mark.parametrize("bad_line", ["add x y", "divide 1 0", "add 1", "history bogus", "clear"])
+def test_app_batch_counts_plugin_errors_as_failures(history_file, capsys, bad_line):
+    """Test that errors a plugin reports itself stop the batch like unknown commands do."""
+    app = App()
+    app.prepare()
+    exit_code = app.run_batch(["add 1 1", bad_line, "add 2 2"], on_error='stop')
+    captured = capsys.readouterr()
+    assert exit_code == 1
+    assert "2.0 + 2.0" not in captured.out
+    assert "Processed 2 commands (1 failed)" in captured.err
+
+def test_app_batch_clear_needs_yes_and_never_prompts(history_file, capsys):
+    """Test that a batch refuses a bare clear without reading stdin and clears with --yes."""
+    app = App()
+    app.prepare()
+    with patch("builtins.input", side_effect=AssertionError("prompted")):
+        app.run_batch(["add 1 1", "clear", "yes"])
+        assert CalculationHistory().find() == [(0, "1.0 + 1.0", 2.0)]
+        assert app.run_batch(["clear --yes"]) == 0
+    captured = capsys.readouterr()
+    assert "use 'clear --yes' in a batch" in captured.out
+    assert "All calculation history has been successfully cleared." in captured.out
+    assert CalculationHistory().find() == []
+
+def test_app_batch_saves_history_stats_on_shutdown(history_file, tmp_path):
+    """Test that a batch run closes the history, so the next start reuses the saved stats."""
+    commands = tmp_path / "commands.txt"
+    commands.write_text("add 1 2\nmultiply 3 4\n")
+    assert App().start_batch(str(commands)) == 0
+    assert CalculationHistory._instance is None
+    assert (history_file.parent / "history.csv.stats").exists()
+    with patch("app.calculation_history.HistoryStats.rebuild") as rebuild:
+        history = CalculationHistory()
+    rebuild.assert_not_called()
+    assert history.statistics()['add'].sum == 3.0
+
+def test_app_batch_flush_interval(history_file):
+    """Test that history is flushed every N commands when an interval is given."""
+    app = App()
+    app.prepare()
+    with patch("app.calculation_history.CalculationHistory.append_records",
+               autospec=True) as mock_append:
+        app.run_batch([f"add {i} 1" for i in range(5)], flush_interval=2)
+    assert [len(call.args[1]) for call in mock_append.call_args_list] == [2, 2, 1]
+
+PARALLEL_LINES = ([f"add {i} {i / 3}" for i in range(50)] +
+                  ["divide 1 0", "multiply 2", "eval ans * 2", "unknown_command", "subtract x 1", "clear", "yes"] +
+                  [f"multiply {i} 1.5 2" for i in range(50)] + ["exit", "add 9 9"])
+
+def run_batch_with_jobs(history_file, monkeypatch, capsys, jobs):
+    """Runs PARALLEL_LINES in a fresh history and returns (exit code, stdout, stored rows)."""
+    monkeypatch.setenv("HISTORY_FILE_PATH", str(history_file.parent / f"jobs{jobs}.csv"))
+    monkeypatch.setenv("PARALLEL_SHARD_SIZE", "7")
+    CalculationHistory._instance = None
+    app = App()
+    app.prepare()
+    exit_code = app.run_batch(PARALLEL_LINES, jobs=jobs)
+    CalculationHistory().close()
+    rows = (history_file.parent / f"jobs{jobs}.csv").read_text().splitlines()
+    return exit_code, capsys.readouterr(), rows
+
+def test_app_batch_parallel_matches_sequential(history_file, monkeypatch, capsys):
+    """Test that --jobs gives the same output and history order as a sequential run."""
+    sequential = run_batch_with_jobs(history_file, monkeypatch, capsys, 1)
+    parallel = run_batch_with_jobs(history_file, monkeypatch, capsys, 3)
+    assert parallel[0] == sequential[0] == 0
+    assert parallel[1].out == sequential[1].out
+    assert parallel[2] == sequential[2]
+    assert len(parallel[2]) == 1 + 50 + 1 + 50
+    assert "Processed 107 commands (6 failed)" in parallel[1].err
+
+def test_app_batch_from_stdin_does_not_depend_on_jobs(history_file, tmp_path):
+    """Test that commands piped to a parallel batch never see later batch lines as their input."""
+    runs = []
+    for jobs in (1, 2):
+        environment = {**os.environ, "HISTORY_FILE_PATH": str(tmp_path / f"jobs{jobs}.csv")}
+        completed = subprocess.run([sys.executable, "main.py", "--jobs", str(jobs)],
+                                   input="add 1 2\nclear\nyes\nadd 3 4\n", capture_output=True, text=True,
+                                   env=environment, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        runs.append((completed.stdout, (tmp_path / f"jobs{jobs}.csv").read_text().splitlines()))
+    assert runs[0] == runs[1]
+    assert runs[0][1] == ["Operation,Result", "1.0 + 2.0,3.0", "3.0 + 4.0,7.0"]
+
+def test_app_batch_parallel_stop_on_error(history_file, capsys):
+    """Test that the stop policy also halts a parallel batch at the first failure."""
+    app = App()
+    app.prepare()
+    exit_code = app.run_batch(["add 1 1", "unknown_command", "add 2 2"], on_error='stop', jobs=2)
+    captured = capsys.readouterr()
+    assert exit_code == 1
+    assert "1.0 + 1.0 = 2.0" in captured.out
+    assert "2.0 + 2.0" not in captured.out
+    assert history_file.read_text().splitlines() == ["Operation,Result", "1.0 + 1.0,2.0"]
+
+def test_app_startup_does_not_import_heavy_modules():
+    """Test that importing the app and loading plugins leaves pandas, numpy and the --serve/--jobs machinery unloaded."""
+    code = ("import sys; from app import App; app = App(); app.prepare(); "
+            "print(app.startup_report(0.0)); "
+            "sys.exit(any(name in sys.modules for name in ('pandas', 'numpy', 'asyncio', 'concurrent.futures')))")
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), check=False)
+    assert completed.returncode == 0, completed.stdout
+    assert "heavy modules loaded: none" in completed.stdout
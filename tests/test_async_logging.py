@@ -0,0 +1,75 @@
+"""Tests for the queue-based asynchronous logging pipeline."""
+import logging
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app import App
+from app.async_logging import AsyncLogging
+
+class CollectingHandler(logging.Handler):
+    """Handler that remembers each message and the thread that wrote it."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+        self.threads.add(threading.current_thread().name)
+
+@pytest.fixture
+def collector():
+    """Install a collecting handler on the root logger for the duration of a test."""
+    root = logging.getLogger()
+    handler = CollectingHandler()
+    old_level = root.level
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    yield handler
+    root.removeHandler(handler)
+    root.setLevel(old_level)
+
+def test_records_written_by_background_thread(collector):
+    """Test that records are handed to the original handlers off the calling thread."""
+    async_logging = AsyncLogging()
+    async_logging.start()
+    assert collector not in logging.getLogger().handlers
+    logging.info("hello from the command path")
+    async_logging.stop()
+    assert "hello from the command path" in collector.messages
+    assert threading.current_thread().name not in collector.threads
+    assert collector in logging.getLogger().handlers
+
+def test_success_records_are_sampled(collector):
+    """Test that sampling drops routine success records but keeps everything else."""
+    async_logging = AsyncLogging(sample_rate=0.0)
+    async_logging.start()
+    logging.info("Addition operation recorded successfully: 1.0 + 2.0 = 3.0")
+    logging.getLogger("CommandHandler").info("Executing command: add with arguments: 1 2")
+    logging.info("Calculation history cleared successfully.")
+    logging.warning("Attempted division by zero.")
+    async_logging.stop()
+    assert collector.messages == ["Calculation history cleared successfully.", "Attempted division by zero."]
+
+def test_stop_is_idempotent(collector):
+    """Test that stopping twice (e.g. on exit and again at interpreter shutdown) is harmless."""
+    async_logging = AsyncLogging()
+    async_logging.start()
+    async_logging.stop()
+    async_logging.stop()
+    assert logging.getLogger().handlers.count(collector) == 1
+
+def test_app_flushes_async_logging_on_exit(monkeypatch):
+    """Test that LOG_ASYNC enables the queue and the exit command drains it."""
+    monkeypatch.setenv("LOG_ASYNC", "true")
+    monkeypatch.setattr('builtins.input', lambda _: 'exit')
+    app = App()
+    assert app.async_logging.listener is not None
+    with patch.object(app.async_logging, 'stop', wraps=app.async_logging.stop) as mock_stop:
+        with pytest.raises(SystemExit):
+            app.run_command_loop()
+    mock_stop.assert_called_once()
+    assert app.async_logging.listener is None
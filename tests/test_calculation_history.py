@@ -4,12 +4,21 @@ ensure that the CalculationHistory class correctly initializes, loads, adds,
 saves, and deletes calculation records, with a focus on functionality for
 managing calculation history in a DataFrame.
 """
+import os
+import statistics
+import subprocess
+import sys
+import threading
 from unittest.mock import patch, MagicMock
 import pytest
 import pandas as pd
 
 
 from app.calculation_history import CalculationHistory
+from app.history_backends.binary_backend import BinaryBackend
+from app.history_buffer import HistoryBuffer
+from app.history_index import HistoryIndex, operands_of
+from app.history_stats import HistoryStats, RunningStats, operation_type
 
 # Fixture to reset the CalculationHistory singleton for isolation between tests
 @pytest.fixture(autouse=True)
@@ -32,19 +41,16 @@ def test_load_or_initialize_history_with_existing_file(mock_abspath, mock_getenv
     assert history.history_df.iloc[0]['Result'] == 7
 
 @patch("dotenv.load_dotenv", MagicMock())
-@patch("os.makedirs", MagicMock())
-@patch("pandas.DataFrame.to_csv", MagicMock())
-def test_save_history():
+def test_save_history(history_file):
     """Test saving the current history to a file."""
     history = CalculationHistory()
-    history.history_df = MagicMock()
+    history.history_df = pd.DataFrame([{'Operation': '3 + 4', 'Result': 7}])
     history.save_history()
-    history.history_df.to_csv.assert_called_with(history.history_file, index=False)
+    assert pd.read_csv(history_file).values.tolist() == [['3 + 4', 7]]
 
 @patch("dotenv.load_dotenv", MagicMock())
-@patch("os.makedirs", MagicMock())
 @patch("pandas.DataFrame.to_csv", MagicMock())
-def test_add_record():
+def test_add_record(history_file):
     """Test adding a record to the calculation history."""
     history = CalculationHistory()
     history.add_record("3 * 3", 9)
@@ -52,10 +58,37 @@ def test_add_record():
     assert history.history_df.iloc[-1]['Operation'] == "3 * 3"
     assert history.history_df.iloc[-1]['Result'] == 9
 
+def test_add_record_appends_without_rewriting(history_file):
+    """Test that recording a result appends one row instead of rewriting the file."""
+    history_file.write_text("Operation,Result\n3.0 + 4.0,7.0")
+    history = CalculationHistory()
+    with patch("pandas.DataFrame.to_csv") as mock_to_csv:
+        history.add_record("2.0 * 3.0", 6.0)
+        history.add_record("8.0 / 2.0", 4.0)
+    mock_to_csv.assert_not_called()
+    assert history_file.read_text().splitlines() == [
+        "Operation,Result", "3.0 + 4.0,7.0", "2.0 * 3.0,6.0", "8.0 / 2.0,4.0"]
+
+def test_add_record_writes_header_for_new_file(history_file):
+    """Test that the first appended row creates the file with a header."""
+    history = CalculationHistory()
+    history.add_record("1.0 + 1.0", 2.0)
+    history.close()
+    assert pd.read_csv(history_file).to_dict('records') == [{'Operation': '1.0 + 1.0', 'Result': 2.0}]
+
+@patch("os.fsync")
+def test_add_record_fsync_policy(mock_fsync, history_file, monkeypatch):
+    """Test that HISTORY_FSYNC=always syncs every appended row."""
+    monkeypatch.setenv("HISTORY_FSYNC", "always")
+    history = CalculationHistory()
+    history.add_record("1.0 + 1.0", 2.0)
+    history.add_record("1.0 + 2.0", 3.0)
+    assert mock_fsync.call_count == 2
+
 @patch("dotenv.load_dotenv", MagicMock())
 @patch("os.makedirs", MagicMock())
 @patch("pandas.DataFrame.to_csv", MagicMock())
-def test_clear_history():
+def test_clear_history(history_file):
     """Test clearing all records from the calculation history."""
     history = CalculationHistory()
     history.clear_history()
@@ -66,7 +99,7 @@ def test_clear_history():
 @patch("pandas.DataFrame.to_csv", MagicMock())
 @patch("os.path.exists", return_value=True)
 @patch("pandas.read_csv", return_value=pd.DataFrame([{'Operation': '3 + 4', 'Result': 7}]))
-def test_delete_history_valid_index(mock_read_csv, mock_exists):
+def test_delete_history_valid_index(mock_read_csv, mock_exists, history_file):
     """Test deleting a history record by a valid index."""
     history = CalculationHistory()
     result = history.delete_history(0)
@@ -78,9 +111,527 @@ def test_delete_history_valid_index(mock_read_csv, mock_exists):
 @patch("pandas.DataFrame.to_csv", MagicMock())
 @patch("os.path.exists", return_value=True)
 @patch("pandas.read_csv", return_value=pd.DataFrame([{'Operation': '3 + 4', 'Result': 7}]))
-def test_delete_history_invalid_index(mock_read_csv, mock_exists):
+def test_delete_history_invalid_index(mock_read_csv, mock_exists, history_file):
     """Test attempting to delete a history record by an invalid index."""
     history = CalculationHistory()
     result = history.delete_history(999)  # Assuming an index that doesn't exist
     assert result is False
     assert not history.history_df.empty  # The DataFrame should remain unchanged
+
+def test_add_record_does_not_build_dataframe(history_file):
+    """Test that recording results only grows the buffer until a DataFrame is requested."""
+    history = CalculationHistory()
+    with patch("pandas.concat") as mock_concat, patch("pandas.DataFrame") as mock_frame:
+        for i in range(100):
+            history.add_record(f"{i} + 1", i + 1)
+    mock_concat.assert_not_called()
+    mock_frame.assert_not_called()
+    assert len(history.buffer) == 100
+    assert history.history_df['Result'].tolist()[-3:] == [98.0, 99.0, 100.0]
+
+def test_history_df_cache_invalidated_on_delete(history_file):
+    """Test that the lazily built DataFrame reflects later mutations."""
+    history = CalculationHistory()
+    history.add_record("1 + 1", 2)
+    history.add_record("2 + 2", 4)
+    assert len(history.history_df) == 2
+    assert history.delete_history(0) is True
+    assert history.history_df.to_dict('records') == [{'Operation': '2 + 2', 'Result': 4.0}]
+
+@pytest.fixture
+def long_history(history_file):
+    """Write a 25-row CSV history (without a trailing newline) and return the singleton."""
+    rows = "\n".join(f"{i}.0 + 1.0,{i + 1}.0" for i in range(25))
+    history_file.write_text(f"Operation,Result\n{rows}")
+    return CalculationHistory()
+
+def test_load_history_streams_in_chunks(long_history, monkeypatch, capsys):
+    """Test that load_history prints every row, one chunk at a time."""
+    monkeypatch.setenv("HISTORY_LOAD_CHUNK_SIZE", "10")
+    with patch("pandas.read_csv") as mock_read_csv:
+        assert long_history.load_history() is True
+    mock_read_csv.assert_not_called()
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 26
+    assert lines[1].split() == ["0", "0.0", "+", "1.0", "1.0"]
+
+def test_load_history_offset_and_limit(long_history, capsys):
+    """Test paging through the history with an offset and a limit."""
+    assert long_history.load_history(offset=20, limit=3) is True
+    rows = [line.split()[0] for line in capsys.readouterr().out.splitlines()[1:]]
+    assert rows == ["20", "21", "22"]
+
+def test_load_history_tail(long_history, capsys):
+    """Test that --tail reads only the last rows, including one without a trailing newline."""
+    assert long_history.load_history(tail=2) is True
+    rows = [line.split() for line in capsys.readouterr().out.splitlines()[1:]]
+    assert rows == [["23", "23.0", "+", "1.0", "24.0"], ["24", "24.0", "+", "1.0", "25.0"]]
+
+def test_load_history_past_the_end(long_history, capsys):
+    """Test that an offset past the last row reports an empty page."""
+    assert long_history.load_history(offset=100) is False
+    assert capsys.readouterr().out == ""
+
+def test_delete_history_is_a_tombstone(history_file, monkeypatch):
+    """Test that deleting below the compaction threshold leaves the store untouched."""
+    monkeypatch.setenv("HISTORY_COMPACT_RATIO", "0.5")
+    history = CalculationHistory()
+    history.add_records([f"{i} + 0" for i in range(10)], [float(i) for i in range(10)])
+    before = history_file.read_text()
+    with patch.object(history.backend, 'rewrite') as mock_rewrite:
+        assert history.delete_history(3) is True
+        assert history.delete_history(3) is False
+    mock_rewrite.assert_not_called()
+    assert history_file.read_text() == before
+    assert 3 not in history.history_df.index
+    assert history.history_df.index[4] == 5
+
+def test_tombstones_survive_restart(history_file, capsys):
+    """Test that tombstones are reloaded from the delete log and hidden by load."""
+    history = CalculationHistory()
+    history.add_records(["1 + 1", "2 + 2", "3 + 3", "4 + 4", "5 + 5"], [2, 4, 6, 8, 10])
+    history.delete_history(1)
+    history.close()
+    CalculationHistory._instance = None
+    history = CalculationHistory()
+    assert history.deleted == {1}
+    capsys.readouterr()
+    history.load_history(tail=2)
+    history.load_history()
+    rows = [line.split()[0] for line in capsys.readouterr().out.splitlines() if not line.startswith(" Index")]
+    assert rows == ["3", "4", "0", "2", "3", "4"]
+
+def test_compaction_triggered_by_dead_ratio(history_file, monkeypatch):
+    """Test that crossing HISTORY_COMPACT_RATIO rewrites the store without the dead records."""
+    monkeypatch.setenv("HISTORY_COMPACT_RATIO", "0.3")
+    history = CalculationHistory()
+    history.add_records(["1 + 1", "2 + 2", "3 + 3", "4 + 4", "5 + 5"], [2, 4, 6, 8, 10])
+    history.delete_history(0)
+    assert history.deleted == {0}
+    history.delete_history(2)
+    assert history.deleted == set()
+    assert not (history_file.parent / "history.csv.deleted").exists()
+    assert pd.read_csv(history_file)['Operation'].tolist() == ["2 + 2", "4 + 4", "5 + 5"]
+
+def test_singleton_initialized_once_across_threads(history_file):
+    """Test that racing constructors all get the same, fully initialized instance."""
+    barrier = threading.Barrier(16)
+    instances = []
+    def construct():
+        barrier.wait()
+        instances.append(CalculationHistory())
+    with patch.object(CalculationHistory, 'initialize', autospec=True,
+                      side_effect=CalculationHistory.initialize) as initialize:
+        threads = [threading.Thread(target=construct) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert initialize.call_count == 1
+    assert len({id(instance) for instance in instances}) == 1
+
+def hammer(history, threads=16, records=200):
+    """Adds records from many threads at once, each thread tagging its own operations."""
+    barrier = threading.Barrier(threads)
+    def worker(thread):
+        barrier.wait()
+        for n in range(records):
+            history.add_record(f"{thread} + {n}", thread + n)
+    workers = [threading.Thread(target=worker, args=(thread,)) for thread in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+
+@pytest.mark.parametrize("commit_window", ["0", "0.005"])
+def test_concurrent_add_record_loses_nothing(history_file, monkeypatch, commit_window):
+    """Test that records added from many threads all reach the buffer and the file, in order."""
+    monkeypatch.setenv("HISTORY_COMMIT_WINDOW", commit_window)
+    history = CalculationHistory()
+    hammer(history)
+    stored = pd.read_csv(history_file)
+    assert len(history.buffer) == len(stored) == 3200
+    assert stored['Operation'].tolist() == history.buffer.operations
+    for thread in range(16):
+        mine = [operation for operation in history.buffer.operations if operation.startswith(f"{thread} + ")]
+        assert mine == [f"{thread} + {n}" for n in range(200)]
+
+def test_group_commit_coalesces_concurrent_writes(history_file, monkeypatch):
+    """Test that the writer thread commits many callers' records in few writes."""
+    monkeypatch.setenv("HISTORY_COMMIT_WINDOW", "0.005")
+    history = CalculationHistory()
+    with patch.object(CalculationHistory, 'append_records', autospec=True,
+                      side_effect=CalculationHistory.append_records) as append:
+        hammer(history)
+    assert sum(len(call.args[1]) for call in append.call_args_list) == 3200
+    assert append.call_count < 3200 // 4
+
+def test_concurrent_deletes_and_adds(history_file, monkeypatch):
+    """Test that deletes and compaction interleaved with adds keep the store consistent."""
+    monkeypatch.setenv("HISTORY_COMMIT_WINDOW", "0.002")
+    monkeypatch.setenv("HISTORY_COMPACT_RATIO", "0.1")
+    history = CalculationHistory()
+    history.add_records([f"0 + {n}" for n in range(100)], list(range(100)))
+    def delete_oldest():
+        for _ in range(50):
+            with history.lock:
+                assert history.delete_history(min(set(range(len(history.buffer))) - history.deleted))
+    deleter = threading.Thread(target=delete_oldest)
+    with patch('builtins.print'):
+        deleter.start()
+        hammer(history, threads=8, records=50)
+        deleter.join()
+    history.flush()
+    live = len(history.buffer) - len(history.deleted)
+    assert live == 100 + 400 - 50
+    assert len(pd.read_csv(history_file)) == len(history.buffer)
+
+def test_operation_type():
+    """Test that records are classified by their operator."""
+    assert operation_type("1.0 + 2.0 + 3.0") == 'add'
+    assert operation_type("5.0 - -2.0") == 'subtract'
+    assert operation_type("2.0 * 3.0") == 'multiply'
+    assert operation_type("1.0 / 4.0") == 'divide'
+    assert operation_type("(3 + 4) * 2") == 'eval'
+    assert operation_type("2 ** 10") == 'eval'
+
+def test_running_stats_add_remove_and_merge():
+    """Test Welford mean/variance, compensated sums and removal against direct computation."""
+    cancelling = RunningStats()
+    for value in [1e16, 1.0, -1e16, 3.5]:
+        cancelling.add(value)
+    assert cancelling.sum == 4.5
+    assert cancelling.mean == 1.125
+    stats = RunningStats()
+    for value in [1.0, 9.0, 3.5, 2.25, 1.0]:
+        stats.add(value)
+    stats.remove(9.0)
+    live = [1.0, 3.5, 2.25, 1.0]
+    assert stats.count == 4
+    assert stats.sum == sum(live)
+    assert stats.mean == pytest.approx(statistics.fmean(live))
+    assert stats.variance == pytest.approx(statistics.variance(live))
+    assert stats.stale
+    halves = [RunningStats(), RunningStats()]
+    for index, value in enumerate(live):
+        halves[index % 2].add(value)
+    merged = RunningStats.merged(halves)
+    assert merged.mean == pytest.approx(statistics.fmean(live))
+    assert merged.variance == pytest.approx(statistics.variance(live))
+    assert (merged.minimum, merged.maximum) == (1.0, 3.5)
+
+def test_history_stats_follow_adds_and_deletes(history_file, capsys):
+    """Test that aggregates are updated on add, adjusted on delete and rescan a deleted extreme."""
+    history = CalculationHistory()
+    history.add_record("1.0 + 2.0", 3.0)
+    history.add_records(["3.0 + 4.0", "2.0 * 5.0", "0.5 + 0.5"], [7.0, 10.0, 1.0])
+    add = history.statistics()['add']
+    assert (add.count, add.sum, add.minimum, add.maximum) == (3, 11.0, 1.0, 7.0)
+    history.delete_history(1)
+    add = history.statistics()['add']
+    assert (add.count, add.sum, add.minimum, add.maximum) == (2, 4.0, 1.0, 3.0)
+    history.delete_history(2)
+    assert 'multiply' not in history.statistics()
+
+def test_history_stats_persisted_beside_history(history_file, monkeypatch):
+    """Test that saved aggregates are reused on restart and rebuilt when the history changed."""
+    history = CalculationHistory()
+    history.add_records(["1.0 + 2.0", "3.0 + 4.0"], [3.0, 7.0])
+    history.close()
+    assert (history_file.parent / "history.csv.stats").exists()
+    CalculationHistory._instance = None
+    with patch.object(HistoryStats, 'rebuild') as rebuild:
+        history = CalculationHistory()
+    rebuild.assert_not_called()
+    assert history.statistics()['add'].sum == 10.0
+    history.close()
+    with open(history_file, 'a', encoding='utf-8') as appended:
+        appended.write("5.0 + 5.0,10.0\n")
+    CalculationHistory._instance = None
+    history = CalculationHistory()
+    assert history.statistics()['add'].count == 3
+
+def test_history_index_lookups(monkeypatch):
+    """Test result ranges across the sorted index and the unsorted tail, postings and operands."""
+    monkeypatch.setattr("app.history_index.MERGE_THRESHOLD", 3)
+    buffer = HistoryBuffer(["1.0 + 2.0", "5.0 * 2.0", "(1 + 1) ** 2", "9.0 - 2.0"], [3.0, 10.0, 4.0, 7.0])
+    index = HistoryIndex(buffer)
+    assert index.find(low=3.5, high=7.0) == [2, 3]
+    buffer.extend(["2.0 + 2.0", "0.0 / 1.0"], [4.0, float('nan')])
+    index.add(4)
+    assert index.unsorted == [4]
+    assert index.find(low=4.0, high=4.0) == [2, 4]
+    assert index.find(operation='add') == [0, 4]
+    assert index.find(operation='eval') == [2]
+    assert index.find(operand=2.0) == [0, 1, 3, 4]
+    buffer.extend(["3.0 + 1.0"] * 3, [4.0] * 3)
+    index.add(6)
+    assert index.unsorted == []
+    assert index.find(operation='add', operand=2.0, low=4.0) == [4]
+    assert index.find(low=4.0, high=4.0) == [2, 4, 6, 7, 8]
+    assert operands_of("5.0 - -2.0") == (5.0, -2.0)
+    assert operands_of("2 ** 3") == ()
+
+def test_find_skips_deleted_and_survives_compaction(history_file, capsys):
+    """Test that find hides tombstones and re-indexes after compaction renumbers records."""
+    history = CalculationHistory()
+    history.add_records(["1.0 + 2.0", "3.0 + 4.0", "2.0 * 5.0", "0.5 + 0.5"], [3.0, 7.0, 10.0, 1.0])
+    assert [index for index, _, _ in history.find(operation='add')] == [0, 1, 3]
+    history.delete_history(1)
+    assert history.find(operation='add', low=2.0) == [(0, "1.0 + 2.0", 3.0)]
+    history.compact_history()
+    history.add_record("4.0 + 4.0", 8.0)
+    assert history.find(operation='add') == [(0, "1.0 + 2.0", 3.0), (2, "0.5 + 0.5", 1.0), (3, "4.0 + 4.0", 8.0)]
+    assert history.find(operand=5.0) == [(1, "2.0 * 5.0", 10.0)]
+
+
+@pytest.fixture
+def segmented_history(history_file, monkeypatch):
+    """Keep 5 records hot and roll the rest into 10-record segments."""
+    monkeypatch.setenv("HISTORY_RETAIN", "5")
+    monkeypatch.setenv("HISTORY_SEGMENT_RECORDS", "10")
+    history = CalculationHistory()
+    history.add_records([f"{i}.0 + 1.0" for i in range(20)], [float(i + 1) for i in range(20)])
+    return history
+
+def test_old_records_roll_into_compressed_segments(segmented_history, history_file):
+    """Test that only the newest records stay in memory and the rest are archived."""
+    assert len(segmented_history.buffer) == 5
+    assert segmented_history.archive.count == 15
+    assert (history_file.parent / "history.csv.segments" / "segment-000001.csv.gz").exists()
+    assert pd.read_csv(history_file)['Result'].tolist() == [16.0, 17.0, 18.0, 19.0, 20.0]
+    for i in range(20, 29):
+        segmented_history.add_record(f"{i}.0 + 1.0", float(i + 1))
+    assert len(segmented_history.buffer) == 14
+    segmented_history.add_record("29.0 + 1.0", 30.0)
+    assert len(segmented_history.buffer) == 5
+    assert len(segmented_history.archive.segments) == 2
+    assert segmented_history.last_result() == 30.0
+
+def test_load_history_reads_across_segments(segmented_history, capsys):
+    """Test that loading keeps global indexes and streams archived rows before hot ones."""
+    capsys.readouterr()
+    segmented_history.load_history(offset=13, limit=4)
+    indexes = [line.split()[0] for line in capsys.readouterr().out.splitlines()[1:]]
+    assert indexes == ["13", "14", "15", "16"]
+    segmented_history.delete_history(17)
+    capsys.readouterr()
+    segmented_history.load_history(tail=6)
+    indexes = [line.split()[0] for line in capsys.readouterr().out.splitlines()[1:]]
+    assert indexes == ["13", "14", "15", "16", "18", "19"]
+    assert segmented_history.delete_history(3) is False
+    assert "archived and cannot be deleted" in capsys.readouterr().out
+
+def test_find_and_stats_cover_segments(segmented_history, monkeypatch):
+    """Test that find skips segments by zone map and stats survive a restart."""
+    segmented_history.add_record("2.0 * 50.0", 100.0)
+    with patch.object(segmented_history.archive, 'read', wraps=segmented_history.archive.read) as read:
+        assert segmented_history.find(low=2.0, high=3.0) == [(1, "1.0 + 1.0", 2.0), (2, "2.0 + 1.0", 3.0)]
+        assert segmented_history.find(operation='multiply') == [(20, "2.0 * 50.0", 100.0)]
+    assert read.call_count == 1
+    segmented_history.close()
+    CalculationHistory._instance = None
+    history = CalculationHistory()
+    assert history.statistics()['add'].count == 20
+    assert history.statistics()['add'].sum == 210.0
+    history.clear_history()
+    assert history.archive.count == 0
+
+def stored_rows(backend):
+    """Returns (operation, result, timestamp) for every record in a binary or SQLite store."""
+    if isinstance(backend, BinaryBackend):
+        return list(backend._stored_rows())
+    return backend.connection().execute("SELECT operation, result, created FROM history ORDER BY id").fetchall()
+
+@pytest.mark.parametrize("name", ["history.bin", "history.db"])
+def test_segment_roll_drops_head_without_rewriting(history_file, monkeypatch, name):
+    """Test that a roll removes only the archived records from the store and keeps the survivors' timestamps."""
+    monkeypatch.setenv("HISTORY_FILE_PATH", str(history_file.parent / name))
+    monkeypatch.setenv("HISTORY_RETAIN", "2")
+    monkeypatch.setenv("HISTORY_SEGMENT_RECORDS", "3")
+    history = CalculationHistory()
+    history.add_records(["1.0 + 1.0", "2.0 + 2.0", "3.0 + 3.0", "4.0 + 4.0"], [2.0, 4.0, 6.0, 8.0])
+    stored = stored_rows(history.backend)
+    with patch.object(type(history.backend), 'rewrite', side_effect=AssertionError("rewritten")):
+        history.add_record("5.0 + 5.0", 10.0)
+    assert history.archive.count == 3
+    after = stored_rows(history.backend)
+    assert after[0] == stored[3]
+    assert [row[0] for row in after] == ["4.0 + 4.0", "5.0 + 5.0"]
+
+def test_assigning_history_df_forgets_old_tombstones(history_file, monkeypatch):
+    """Test that records assigned through history_df are not hidden by tombstones of the old ones."""
+    monkeypatch.setenv("HISTORY_COMPACT_RATIO", "1.0")
+    history = CalculationHistory()
+    history.add_records(["1.0 + 1.0", "2.0 + 2.0"], [2.0, 4.0])
+    assert history.delete_history(0) is True
+    history.history_df = pd.DataFrame([{'Operation': '3.0 + 3.0', 'Result': 6.0}])
+    history.save_history()
+    history.close()
+    CalculationHistory._instance = None
+    assert CalculationHistory().find() == [(0, "3.0 + 3.0", 6.0)]
+
+def test_assigning_history_df_keeps_archived_stats(segmented_history):
+    """Test that replacing the live records keeps archived records in the running stats."""
+    segmented_history.history_df = pd.DataFrame([{'Operation': '2.0 * 3.0', 'Result': 6.0}])
+    statistics = segmented_history.statistics()
+    assert statistics['add'].count == 15
+    assert statistics['multiply'].count == 1
+
+def test_lzma_segments(history_file, monkeypatch):
+    """Test that segments can be compressed with lzma."""
+    monkeypatch.setenv("HISTORY_RETAIN", "1")
+    monkeypatch.setenv("HISTORY_SEGMENT_RECORDS", "2")
+    monkeypatch.setenv("HISTORY_SEGMENT_COMPRESSION", "lzma")
+    history = CalculationHistory()
+    history.add_records(["1.0 + 1.0", "2.0 + 2.0", "3.0 + 3.0"], [2.0, 4.0, 6.0])
+    assert (history_file.parent / "history.csv.segments" / "segment-000001.csv.xz").exists()
+    assert list(history.archive.rows()) == [("1.0 + 1.0", 2.0), ("2.0 + 2.0", 4.0)]
+
+def test_refresh_reads_only_what_another_process_appended(history_file, capsys):
+    """Test that an unchanged file is not re-read and a grown one is read from the last offset."""
+    history_file.write_text("Operation,Result\n1.0 + 1.0,2.0\n")
+    history = CalculationHistory()
+    history.add_record("2.0 + 2.0", 4.0)
+    with patch("pandas.read_csv") as read_csv, patch("builtins.open", wraps=open) as opened:
+        assert history.refresh() == 0
+        assert opened.call_count == 0
+        with open(history_file, 'a', encoding='utf-8') as other:
+            other.write("3.0 + 3.0,6.0\n4.0 + 4.0,8")
+        assert history.refresh() == 1
+        assert history.history_df['Result'].tolist() == [2.0, 4.0, 6.0]
+        with open(history_file, 'a', encoding='utf-8') as other:
+            other.write(".0\n")
+        history.load_history(tail=1)
+    read_csv.assert_not_called()
+    assert "4.0 + 4.0" in capsys.readouterr().out
+    assert history.statistics()['add'].count == 4
+
+def test_refresh_reloads_a_rewritten_file(history_file):
+    """Test that a file another process rewrote is loaded again in full."""
+    history = CalculationHistory()
+    history.add_records(["1.0 + 1.0", "2.0 + 2.0"], [2.0, 4.0])
+    history_file.write_text("Operation,Result\n5.0 * 5.0,25.0\n")
+    assert history.refresh() == 1
+    assert history.find() == [(0, "5.0 * 5.0", 25.0)]
+
+def test_refresh_reloads_a_rewritten_file_that_grew(history_file):
+    """Test that a clear followed by more rows than before is not mistaken for an append."""
+    history = CalculationHistory()
+    history.add_records(["1.0 + 1.0", "2.0 + 2.0"], [2.0, 4.0])
+    other = object.__new__(CalculationHistory)
+    other.initialize()
+    other.clear_history()
+    other.add_records([f"{value}.0 * 1.0" for value in range(6)], [float(value) for value in range(6)])
+    other.close()
+    assert history.refresh() == 6
+    assert history.history_df['Result'].tolist() == [float(value) for value in range(6)]
+
+def test_merge_before_rewrite_keeps_other_processes_records(history_file, monkeypatch):
+    """Test that rows and deletes from another process are merged before compaction rewrites the file."""
+    monkeypatch.setenv("HISTORY_COMPACT_RATIO", "1.0")
+    history = CalculationHistory()
+    history.add_records(["1.0 + 1.0", "2.0 + 2.0", "3.0 + 3.0"], [2.0, 4.0, 6.0])
+    with open(history_file, 'a', encoding='utf-8') as other:
+        other.write("4.0 + 4.0,8.0\n")
+    with open(f"{history_file}.deleted", 'a', encoding='utf-8') as other:
+        other.write("0\n")
+    history.add_record("5.0 + 5.0", 10.0)
+    assert history.delete_history(1) is True
+    assert history.compact_history() == 2
+    assert pd.read_csv(history_file)['Result'].tolist() == [6.0, 8.0, 10.0]
+    assert history.find() == [(0, "3.0 + 3.0", 6.0), (1, "4.0 + 4.0", 8.0), (2, "5.0 + 5.0", 10.0)]
+
+WRITER = """
+import sys
+from app.calculation_history import CalculationHistory
+history = CalculationHistory()
+worker, count = int(sys.argv[1]), int(sys.argv[2])
+for i in range(count):
+    history.add_record(f"{worker}.0 + {i}.0", float(worker + i))
+history.refresh()
+assert len(history.buffer) >= count
+history.close()
+"""
+
+@pytest.mark.parametrize("name", ["history.csv", "history.bin", "history.db"])
+def test_parallel_writer_processes_lose_nothing(tmp_path, monkeypatch, name):
+    """Stress test: several processes appending to one history file keep every record."""
+    monkeypatch.setenv("HISTORY_FILE_PATH", str(tmp_path / name))
+    workers, count = 4, 100
+    processes = [subprocess.Popen([sys.executable, "-c", WRITER, str(worker), str(count)])
+                 for worker in range(workers)]
+    assert [process.wait(timeout=120) for process in processes] == [0] * workers
+    history = CalculationHistory()
+    operations = history.buffer.operations
+    history.close()
+    assert len(operations) == workers * count
+    for worker in range(workers):
+        # Each process's records are all there, in the order it wrote them
+        mine = [operation for operation in operations if operation.startswith(f"{worker}.0 +")]
+        assert mine == [f"{worker}.0 + {i}.0" for i in range(count)]
+
+MIXED_WRITER = """
+import os, sys, time
+from app.calculation_history import CalculationHistory
+history = CalculationHistory()
+worker, count, cleared = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3]
+
+def record(i):
+    result = float(worker * 100000 + i)
+    history.add_record(f"{worker * 100000}.0 + {i}.0", result)
+    if i % 5 == 0:
+        # Find and delete under the file lock, so no other process renumbers the records in between
+        with history.lock, history.file_lock:
+            matches = history.find(low=result, high=result)
+            if matches:
+                assert history.delete_history(matches[0][0]) is True
+    if i % 20 == 19:
+        history.compact_history()
+
+i = 0
+# Keep appending while the clears run, then add count more records that must all survive
+while i < count or not os.path.exists(cleared):
+    record(i)
+    i += 1
+for i in range(i, i + count):
+    record(i)
+history.close()
+print(i + 1)
+"""
+
+CLEARER = """
+import sys, time
+from app.calculation_history import CalculationHistory
+history = CalculationHistory()
+for _ in range(int(sys.argv[1])):
+    time.sleep(0.05)
+    history.clear_history()
+history.close()
+open(sys.argv[2], 'w').close()
+"""
+
+@pytest.mark.parametrize("name", ["history.csv", "history.bin", "history.db"])
+def test_parallel_delete_compact_and_clear_lose_nothing(tmp_path, monkeypatch, name):
+    """Stress test: deletes, compactions and clears racing with appends only remove what they target."""
+    monkeypatch.setenv("HISTORY_FILE_PATH", str(tmp_path / name))
+    workers, count, cleared = 3, 50, str(tmp_path / "cleared")
+    processes = [subprocess.Popen([sys.executable, "-c", MIXED_WRITER, str(worker), str(count), cleared],
+                                  stdout=subprocess.PIPE, text=True) for worker in range(workers)]
+    clearer = subprocess.Popen([sys.executable, "-c", CLEARER, "3", cleared])
+    written = [int(process.communicate(timeout=120)[0].split()[-1]) for process in processes]
+    assert [process.returncode for process in processes] == [0] * workers
+    assert clearer.wait(timeout=120) == 0
+    history = CalculationHistory()
+    live = [operation for _, operation, _ in history.find()]
+    history.compact_history()
+    stored = list(history.buffer.operations)
+    history.close()
+    assert stored == live
+    for worker in range(workers):
+        # A clear drops everything before it, so each process keeps an unbroken tail of its
+        # records, minus the ones it deleted itself, and nothing it wrote after the clears
+        mine = [operation for operation in live if operation.startswith(f"{worker * 100000}.0 +")]
+        expected = [f"{worker * 100000}.0 + {i}.0" for i in range(written[worker]) if i % 5]
+        assert mine == expected[len(expected) - len(mine):]
+        assert len(mine) >= count - count // 5
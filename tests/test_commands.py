@@ -1,5 +1,7 @@
 """Module for testing command functionalities in the application."""
+import pstats
 from unittest.mock import patch, MagicMock
+import pandas as pd
 import pytest
 
 from app.calculation_history import CalculationHistory
@@ -8,6 +10,16 @@ from app.plugins.subtract import SubtractCommand
 from app.plugins.multiply import MultiplyCommand
 from app.plugins.divide import DivideCommand
 from app.plugins.exit import ExitCommand
+from app.plugins.bulk import BulkCommand
+from app.plugins.cache import CacheCommand
+from app.plugins.profile import ProfileCommand
+from app.commands import CommandHandler
+from app.result_cache import ResultCache
+
+@pytest.fixture(autouse=True)
+def isolated_history(history_file):
+    """Keep every command test away from the real history file."""
+    return history_file
 
 def test_add_command_no_arguments(capsys):
     """Test displaying usage instructions when no arguments are provided for the add command."""
@@ -28,7 +40,7 @@ def test_add_command_non_numeric_arguments(capsys):
     command = AddCommand()
     command.execute("a b")
     captured = capsys.readouterr()
-    assert "Error: Please provide two numbers separated by a space." in captured.out
+    assert "Error: Please provide two or more numbers separated by spaces." in captured.out
 
 @patch.object(CalculationHistory, 'add_record')
 def test_add_command_success(mock_add_record, capsys):
@@ -59,7 +71,7 @@ def test_subtract_command_invalid_arguments(mock_logging_error, capsys):
     command = SubtractCommand()
     command.execute("one two")
     captured = capsys.readouterr()
-    assert "Error: Please provide two numbers separated by a space." in captured.out
+    assert "Error: Please provide two or more numbers separated by spaces." in captured.out
     mock_logging_error.assert_called_once()
 
 @patch("app.calculation_history.CalculationHistory.add_record", MagicMock())
@@ -91,7 +103,7 @@ def test_divide_command_incorrect_arguments_count(mock_logging, divide_command,
     divide_command.execute("1")
     captured = capsys.readouterr()
     assert "Usage: divide <number1> <number2>" in captured.out
-    mock_logging.assert_called_with("Divide command requires exactly two arguments.")
+    mock_logging.assert_called_with("Divide command requires at least two arguments.")
 
 @patch("logging.warning")
 def test_divide_command_division_by_zero(mock_logging, divide_command, capsys):
@@ -106,7 +118,7 @@ def test_divide_command_invalid_arguments(mock_logging, divide_command, capsys):
     """Test error message for non-numeric arguments in divide command."""
     divide_command.execute("one two")
     captured = capsys.readouterr()
-    assert "Error: Please provide two numbers separated by a space." in captured.out
+    assert "Error: Please provide two or more numbers separated by spaces." in captured.out
     mock_logging.assert_called_with("Divide command received invalid arguments.")
 
 @patch("app.calculation_history.CalculationHistory.add_record")
@@ -139,7 +151,7 @@ def test_multiply_command_invalid_arguments(mock_logging_error, capsys):
     command = MultiplyCommand()
     command.execute("one two")
     captured = capsys.readouterr()
-    assert "Error: Please provide two numbers separated by a space." in captured.out
+    assert "Error: Please provide two or more numbers separated by spaces." in captured.out
     mock_logging_error.assert_called_once_with("Multiply command received invalid arguments.", exc_info=True)
 
 @patch("app.calculation_history.CalculationHistory.add_record", MagicMock())
@@ -168,3 +180,158 @@ def test_exit_command(mock_exit, mock_logging_info, capsys):
 
     # Check the printed exit message
     assert "Exiting..." in captured.out
+
+def test_bulk_command_usage(capsys):
+    """Test displaying usage instructions for invalid bulk arguments."""
+    command = BulkCommand()
+    command.execute("power in.csv out.csv")
+    captured = capsys.readouterr()
+    assert "Usage: bulk <add|subtract|multiply|divide> <input.csv> <output.csv>" in captured.out
+
+def test_bulk_command_multiply(tmp_path, history_file, monkeypatch, capsys):
+    """Test vectorized multiplication across chunks with one batched history write."""
+    monkeypatch.setenv("BULK_CHUNK_SIZE", "2")
+    input_file, output_file = tmp_path / "in.csv", tmp_path / "out.csv"
+    input_file.write_text("a,b\n1,2\n3,4\n5,6\n")
+    with patch.object(CalculationHistory, 'add_records') as mock_add_records:
+        BulkCommand().execute(f"multiply {input_file} {output_file}")
+    assert pd.read_csv(output_file)['result'].tolist() == [2.0, 12.0, 30.0]
+    mock_add_records.assert_called_once_with(["1.0 * 2.0", "3.0 * 4.0", "5.0 * 6.0"], [2.0, 12.0, 30.0])
+    assert "3 rows written to" in capsys.readouterr().out
+
+def test_bulk_command_without_header_keeps_first_row(tmp_path, history_file, capsys):
+    """Test that a header-less input computes every operand pair, including the first."""
+    input_file, output_file = tmp_path / "in.csv", tmp_path / "out.csv"
+    input_file.write_text("3,4\n5,0\n6,2\n")
+    BulkCommand().execute(f"divide {input_file} {output_file}")
+    assert pd.read_csv(output_file)['a'].tolist() == [3.0, 5.0, 6.0]
+    assert pd.read_csv(history_file)['Operation'].tolist() == ["3.0 / 4.0", "6.0 / 2.0"]
+    assert "3 rows written to" in capsys.readouterr().out
+
+def test_bulk_command_divide_by_zero_mask(tmp_path, history_file, capsys):
+    """Test that bulk divide skips zero divisors like DivideCommand does."""
+    input_file, output_file = tmp_path / "in.csv", tmp_path / "out.csv"
+    input_file.write_text("a,b\n10,2\n1,0\n9,3\n")
+    BulkCommand().execute(f"divide {input_file} {output_file}")
+    output = pd.read_csv(output_file)['result'].tolist()
+    assert output[0] == 5.0 and pd.isna(output[1]) and output[2] == 3.0
+    assert pd.read_csv(history_file)['Operation'].tolist() == ["10.0 / 2.0", "9.0 / 3.0"]
+    captured = capsys.readouterr().out
+    assert "Skipped 1 rows: Division by zero is not allowed." in captured
+    assert f"3 rows written to {output_file}, 2 computed and recorded." in captured
+
+@pytest.fixture
+def result_cache(monkeypatch):
+    """Provide a fresh, small ResultCache singleton."""
+    monkeypatch.setenv("RESULT_CACHE_SIZE", "2")
+    ResultCache._instance = None
+    yield ResultCache()
+    ResultCache._instance = None
+
+@patch("app.calculation_history.CalculationHistory.add_record")
+def test_arithmetic_results_are_cached(mock_add_record, result_cache, capsys):
+    """Test that repeated operand pairs are served from the shared cache and still recorded."""
+    with patch.object(AddCommand, 'calculate', wraps=AddCommand.calculate) as mock_calculate:
+        AddCommand().execute("1 2")
+        AddCommand().execute("1 2")
+    mock_calculate.assert_called_once()
+    assert capsys.readouterr().out.count("1.0 + 2.0 = 3.0") == 2
+    assert mock_add_record.call_count == 2
+    assert result_cache.stats()['hits'] == 1 and result_cache.stats()['misses'] == 1
+
+@patch("app.calculation_history.CalculationHistory.add_record", MagicMock())
+def test_result_cache_evicts_least_recently_used(result_cache):
+    """Test that the cache stays bounded and counts evictions."""
+    MultiplyCommand().execute("1 2")
+    SubtractCommand().execute("1 2")
+    MultiplyCommand().execute("1 2")
+    DivideCommand().execute("1 2")
+    stats = result_cache.stats()
+    assert stats['size'] == 2 and stats['evictions'] == 1
+    SubtractCommand().execute("1 2")
+    assert result_cache.stats()['misses'] == 4
+
+def test_division_by_zero_is_not_cached(result_cache, capsys):
+    """Test that failed divisions never enter the cache."""
+    DivideCommand().execute("1 0")
+    DivideCommand().execute("1 0")
+    assert capsys.readouterr().out.count("Error: Division by zero is not allowed.") == 2
+    assert result_cache.stats()['size'] == 0
+
+@patch("app.calculation_history.CalculationHistory.add_record", MagicMock())
+def test_cache_stats_command(result_cache, capsys):
+    """Test that 'cache stats' reports hits, misses, evictions and hit rate."""
+    AddCommand().execute("1 2")
+    AddCommand().execute("1 2")
+    CacheCommand().execute("stats")
+    out = capsys.readouterr().out
+    assert "Result cache: 1/2 entries" in out
+    assert "Hits: 1, misses: 1, evictions: 0" in out
+    assert "Hit rate: 50.0%" in out
+    CacheCommand().execute("clear")
+    assert result_cache.stats()['size'] == 0
+    CacheCommand().execute("bogus")
+    assert "Usage: cache <stats|clear>" in capsys.readouterr().out
+
+@patch("app.calculation_history.CalculationHistory.add_record")
+def test_add_command_many_operands_is_exact(mock_add_record, capsys):
+    """Test that n-ary addition is exactly rounded and recorded once."""
+    AddCommand().execute("0.1 0.1 0.1 0.1 0.1 0.1 0.1 0.1 0.1 0.1")
+    assert " + ".join(["0.1"] * 10) + " = 1.0" in capsys.readouterr().out
+    mock_add_record.assert_called_once_with(" + ".join(["0.1"] * 10), 1.0)
+
+@patch("app.calculation_history.CalculationHistory.add_record")
+def test_subtract_command_many_operands(mock_add_record, capsys):
+    """Test that n-ary subtraction subtracts every later operand from the first."""
+    SubtractCommand().execute("1e16 1 1")
+    mock_add_record.assert_called_once_with("1e+16 - 1.0 - 1.0", 9999999999999998.0)
+    AddCommand().execute("1e308 1e308")
+    assert "1e+308 + 1e+308 = inf" in capsys.readouterr().out
+
+@patch("app.calculation_history.CalculationHistory.add_record")
+def test_multiply_and_divide_many_operands(mock_add_record, capsys):
+    """Test n-ary products and quotients, including a zero divisor in a later position."""
+    MultiplyCommand().execute("2 3 4")
+    DivideCommand().execute("100 5 2")
+    DivideCommand().execute("100 5 0")
+    out = capsys.readouterr().out
+    assert "2.0 * 3.0 * 4.0 = 24.0" in out
+    assert "100.0 / 5.0 / 2.0 = 10.0" in out
+    assert "Error: Division by zero is not allowed." in out
+    assert mock_add_record.call_count == 2
+
+def test_profile_command_captures_plugin_calls(history_file, tmp_path, capsys):
+    """Test that 'profile start'/'profile stop <file>' profiles commands and writes pstats plus a summary."""
+    handler = CommandHandler()
+    handler.register_command('add', AddCommand())
+    handler.register_command('profile', ProfileCommand(handler))
+    handler.execute_command('profile', 'start')
+    handler.execute_command('profile', 'start')
+    assert "Profiling is already running." in capsys.readouterr().out
+    handler.execute_command('add', '1 2')
+    path = tmp_path / "session.pstats"
+    handler.execute_command('profile', f'stop {path}')
+    out = capsys.readouterr().out
+    assert f"Profile written to {path}" in out
+    assert handler.profiler is None
+    stats = pstats.Stats(str(path))
+    assert any(function == 'calculate' for _, _, function in stats.stats)
+    assert "cumulative" in (tmp_path / "session.txt").read_text()
+
+def test_profile_command_stop_without_start_and_usage(capsys):
+    """Test the messages for stopping an idle profiler and for invalid arguments."""
+    command = ProfileCommand(CommandHandler())
+    command.execute("stop")
+    assert "Profiling is not running." in capsys.readouterr().out
+    command.execute("")
+    assert "Usage: profile start | profile stop [<file.pstats>]" in capsys.readouterr().out
+
+def test_profile_default_path(monkeypatch, tmp_path, capsys):
+    """Test that 'profile stop' without a file writes a timestamped file in PROFILE_DIR."""
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    command = ProfileCommand(CommandHandler())
+    command.execute("start")
+    command.execute("stop")
+    assert len(list(tmp_path.glob("profile-*.pstats"))) == 1
+    assert len(list(tmp_path.glob("profile-*.txt"))) == 1
+
@@ -0,0 +1,64 @@
+"""Tests for the compiled expression engine and the eval command."""
+from unittest.mock import patch
+
+import pytest
+
+from app.expression import ExpressionError, compile_expression
+from app.plugins.eval import EvalCommand
+
+@pytest.mark.parametrize("source, expected", [
+    ("(3 + 4) * 2 / 7", 2.0),
+    ("-2 ** 2", -4.0),
+    ("10 % 4 + +1", 3.0),
+    ("2 * pi", 6.283185307179586),
+])
+def test_constant_expressions_fold(source, expected):
+    """Test that constant expressions are folded to a single value at compile time."""
+    expression = compile_expression(source)
+    assert expression.is_constant
+    assert expression.evaluate() == pytest.approx(expected)
+
+def test_variables_compile_to_closures():
+    """Test that expressions using 'ans' stay callable and fold their constant parts."""
+    expression = compile_expression("ans * (1 + 1)")
+    assert not expression.is_constant
+    assert expression.evaluate({'ans': 4.0}) == 8.0
+    assert expression.evaluate({'ans': 0.5}) == 1.0
+
+def test_compiled_expressions_are_cached():
+    """Test that compiling the same source twice reuses the cached compiled form."""
+    compile_expression.cache_clear()
+    first = compile_expression("1 + 2 * 3")
+    assert compile_expression("1 + 2 * 3") is first
+    assert compile_expression.cache_info().hits == 1
+
+@pytest.mark.parametrize("source", ["__import__('os')", "1 +", "abs(-1)", "x + 1", "(1).real", "'a' * 3", "(-8) ** 0.5"])
+def test_unsafe_or_invalid_expressions_rejected(source):
+    """Test that anything outside plain arithmetic is refused."""
+    with pytest.raises(ExpressionError):
+        compile_expression(source).evaluate({'ans': 1.0})
+
+@patch("app.calculation_history.CalculationHistory.add_record")
+def test_eval_command_records_one_entry(mock_add_record, history_file, capsys):
+    """Test that a whole formula is evaluated in one dispatch and recorded as one history entry."""
+    EvalCommand().execute("(3 + 4) * 2 / 7")
+    assert "(3 + 4) * 2 / 7 = 2.0" in capsys.readouterr().out
+    mock_add_record.assert_called_once_with("(3 + 4) * 2 / 7", 2.0)
+
+def test_eval_command_uses_last_result(history_file, capsys):
+    """Test that 'ans' refers to the most recent result in the history."""
+    EvalCommand().execute("ans + 1")
+    assert "Error: 'ans' needs a previous result in the history." in capsys.readouterr().out
+    EvalCommand().execute("6 * 7")
+    EvalCommand().execute("ans / 2")
+    assert "ans / 2 = 21.0" in capsys.readouterr().out
+
+def test_eval_command_errors(history_file, capsys):
+    """Test usage, division by zero and invalid syntax messages."""
+    EvalCommand().execute("")
+    EvalCommand().execute("1 / (2 - 2)")
+    EvalCommand().execute("open('x')")
+    out = capsys.readouterr().out
+    assert "Usage: eval <expression>" in out
+    assert "Error: Division by zero is not allowed." in out
+    assert "Error: Unsupported syntax: Call" in out
@@ -0,0 +1,179 @@
+"""Tests for the pluggable history storage backends."""
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.calculation_history import CalculationHistory
+from app.history_backends import create_backend
+from app.history_backends.binary_backend import (
+    BinaryBackend, HEADER_SIZE, RECORD_SIZE, convert_csv_to_binary)
+from app.history_backends.sqlite_backend import SQLiteBackend
+from app.history_buffer import HistoryBuffer
+
+ROWS = [("3.0 + 4.0", 7.0), ("10.0 / 4.0", 2.5), ("sqrt(16)", 4.0), ("-2.0 * -3.0", 6.0)]
+
+def test_create_backend_rejects_unknown_name(tmp_path):
+    """Test that an unsupported HISTORY_BACKEND value is reported."""
+    with pytest.raises(ValueError):
+        create_backend("xml", str(tmp_path / "history.xml"))
+
+def test_binary_backend_round_trip(tmp_path):
+    """Test that fixed-size records and free-text operations survive a reload."""
+    path = tmp_path / "history.bin"
+    backend = BinaryBackend(str(path))
+    backend.append(ROWS[:2])
+    backend.append(ROWS[2:])
+    backend.close()
+    assert path.stat().st_size == HEADER_SIZE + len(ROWS) * RECORD_SIZE
+    buffer = BinaryBackend(str(path)).load()
+    assert list(zip(buffer.operations, buffer.results)) == ROWS
+
+def test_binary_backend_records_are_memory_mapped(tmp_path):
+    """Test that records load as a zero-copy NumPy view of the file."""
+    backend = BinaryBackend(str(tmp_path / "history.bin"))
+    backend.append(ROWS)
+    records = backend.records()
+    assert isinstance(records, np.memmap)
+    assert records['result'].tolist() == [7.0, 2.5, 4.0, 6.0]
+    assert records['opcode'].tolist() == [1, 4, 0, 3]
+
+def test_binary_backend_compact_keeps_timestamps(tmp_path):
+    """Test that compaction copies the surviving records as they are, timestamps included."""
+    backend = BinaryBackend(str(tmp_path / "history.bin"))
+    backend.append(ROWS)
+    timestamps = backend.records()['timestamp'].tolist()
+    buffer = backend.load()
+    buffer.compact({1, 2})
+    backend.compact([1, 2], buffer)
+    assert backend.count() == 2
+    assert backend.records()['timestamp'].tolist() == [timestamps[0], timestamps[3]]
+    assert backend.load().operations == ["3.0 + 4.0", "-2.0 * -3.0"]
+
+def test_binary_backend_rewrite_keeps_timestamps(tmp_path):
+    """Test that a full rewrite keeps the stored timestamps of surviving records and stamps new ones."""
+    backend = BinaryBackend(str(tmp_path / "history.bin"))
+    backend.append(ROWS[:2])
+    backend.append(ROWS[:1])
+    timestamps = backend.records()['timestamp'].tolist()
+    with patch("time.time", return_value=timestamps[-1] + 100):
+        backend.rewrite(HistoryBuffer(*zip(*(ROWS[1:2] + ROWS[:1] + ROWS[3:]))))
+    assert backend.records()['timestamp'].tolist() == [timestamps[1], timestamps[2], timestamps[-1] + 100]
+    backend.close()
+
+def test_convert_csv_to_binary(tmp_path):
+    """Test converting an existing CSV history into the binary format."""
+    csv_path, binary_path = tmp_path / "history.csv", tmp_path / "history.bin"
+    csv_path.write_text("Operation,Result\n3.0 + 4.0,7.0\n10.0 - 4.0,6.0\n")
+    assert convert_csv_to_binary(str(csv_path), str(binary_path)) == 2
+    buffer = BinaryBackend(str(binary_path)).load()
+    assert buffer.operations == ["3.0 + 4.0", "10.0 - 4.0"]
+
+def test_calculation_history_with_binary_backend(tmp_path, monkeypatch):
+    """Test that HISTORY_BACKEND=binary stores and reloads the calculation history."""
+    monkeypatch.setenv("HISTORY_FILE_PATH", str(tmp_path / "history.bin"))
+    monkeypatch.setenv("HISTORY_BACKEND", "binary")
+    CalculationHistory._instance = None
+    history = CalculationHistory()
+    history.add_record("1.0 + 2.0", 3.0)
+    history.add_record("5.0 * 5.0", 25.0)
+    assert history.delete_history(0) is True
+    history.close()
+    CalculationHistory._instance = None
+    assert CalculationHistory().history_df.to_dict('records') == [{'Operation': '5.0 * 5.0', 'Result': 25.0}]
+    CalculationHistory._instance.close()
+    CalculationHistory._instance = None
+
+def test_backend_inferred_from_extension(tmp_path, monkeypatch):
+    """Test that the history file extension selects the backend when HISTORY_BACKEND is unset."""
+    monkeypatch.delenv("HISTORY_BACKEND", raising=False)
+    monkeypatch.setenv("HISTORY_FILE_PATH", str(tmp_path / "history.db"))
+    CalculationHistory._instance = None
+    history = CalculationHistory()
+    assert isinstance(history.backend, SQLiteBackend)
+    history.close()
+    CalculationHistory._instance = None
+
+def test_sqlite_backend_uses_wal(tmp_path):
+    """Test that the database runs in WAL mode."""
+    backend = SQLiteBackend(str(tmp_path / "history.db"))
+    connection = backend.connection()
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    backend.close()
+
+def test_sqlite_backend_append_compact_and_reload(tmp_path):
+    """Test that compaction deletes only the dead rows and survives reopening the database."""
+    path = str(tmp_path / "history.db")
+    backend = SQLiteBackend(path)
+    backend.append(ROWS)
+    buffer = backend.load()
+    buffer.compact({1})
+    with patch.object(backend, 'rewrite') as mock_rewrite:
+        backend.compact([1], buffer)
+    mock_rewrite.assert_not_called()
+    backend.close()
+    reloaded = SQLiteBackend(path).load()
+    assert list(zip(reloaded.operations, reloaded.results)) == [ROWS[0], ROWS[2], ROWS[3]]
+
+def test_sqlite_backend_rewrite_keeps_timestamps(tmp_path):
+    """Test that a full rewrite keeps the created time of surviving rows and stamps new ones."""
+    backend = SQLiteBackend(str(tmp_path / "history.db"))
+    backend.append(ROWS[:2])
+    created = [row[0] for row in backend.connection().execute("SELECT created FROM history ORDER BY id")]
+    with patch("time.time", return_value=created[-1] + 100):
+        backend.rewrite(HistoryBuffer(*zip(*(ROWS[1:2] + ROWS[3:]))))
+    stored = [row[0] for row in backend.connection().execute("SELECT created FROM history ORDER BY id")]
+    assert stored == [created[1], created[-1] + 100]
+    backend.close()
+
+def test_sqlite_backend_paging(tmp_path):
+    """Test positional paging by row id."""
+    backend = SQLiteBackend(str(tmp_path / "history.db"))
+    backend.append((f"{float(i)} + 1.0", float(i + 1)) for i in range(100))
+    assert backend.page(10, 3) == [("10.0 + 1.0", 11.0), ("11.0 + 1.0", 12.0), ("12.0 + 1.0", 13.0)]
+    assert backend.page(200, 3) == []
+    backend.close()
+
+@pytest.mark.parametrize("backend_class, name", [(BinaryBackend, "history.bin"), (SQLiteBackend, "history.db")])
+def test_backend_streams_pages_and_tail(tmp_path, backend_class, name):
+    """Test chunked paging and tail reads on the binary and SQLite backends."""
+    backend = backend_class(str(tmp_path / name))
+    backend.append(ROWS * 3)
+    assert [len(chunk) for chunk in backend.iter_rows(1, 10, chunk_size=4)] == [4, 4, 2]
+    assert [row for chunk in backend.iter_rows(2, 2) for row in chunk] == ROWS[2:4]
+    assert [row for chunk in backend.iter_tail(3) for row in chunk] == ROWS[1:]
+    backend.close()
+
+@pytest.mark.parametrize("name, backend_name", [("history.csv", "csv"), ("history.bin", "binary"), ("history.db", "sqlite")])
+def test_backend_reads_only_appended_rows(tmp_path, name, backend_name):
+    """Test that another writer's rows are read incrementally and a rewrite asks for a full reload."""
+    path = str(tmp_path / name)
+    reader, writer = create_backend(backend_name, path), create_backend(backend_name, path)
+    writer.append(ROWS[:2])
+    buffer = reader.load()
+    assert list(zip(buffer.operations, buffer.results)) == ROWS[:2]
+    assert not reader.changed()
+    writer.append(ROWS[2:])
+    assert reader.changed()
+    assert reader.read_appended() == ROWS[2:]
+    assert not reader.changed()
+    writer.rewrite(HistoryBuffer(["1.0 + 1.0"], [2.0]))
+    assert reader.changed()
+    assert reader.read_appended() is None
+    writer.close()
+    reader.close()
+
+@pytest.mark.parametrize("name, backend_name", [("history.csv", "csv"), ("history.bin", "binary"), ("history.db", "sqlite")])
+def test_backend_detects_a_rewrite_that_grew(tmp_path, name, backend_name):
+    """Test that a rewrite ending up larger than the synced store still asks for a full reload."""
+    path = str(tmp_path / name)
+    reader, writer = create_backend(backend_name, path), create_backend(backend_name, path)
+    writer.append(ROWS[:2])
+    reader.load()
+    writer.rewrite(HistoryBuffer([operation for operation, _ in ROWS * 2], [result for _, result in ROWS * 2]))
+    assert reader.changed()
+    assert reader.read_appended() is None
+    buffer = reader.load()
+    assert list(zip(buffer.operations, buffer.results)) == ROWS * 2
+    writer.close()
+    reader.close()
@@ -5,10 +5,19 @@ scenarios such as confirmation handling, input validation, and exception handlin
 """
 
 from unittest.mock import patch
+import pytest
+from app.calculation_history import CalculationHistory
 from app.plugins.history.clear import ClearCommand
+from app.plugins.history.compact import CompactCommand
 from app.plugins.history.delete import DeleteCommand
+from app.plugins.history.history import HistoryCommand
 from app.plugins.history.load import LoadCommand
 
+@pytest.fixture(autouse=True)
+def isolated_history(history_file):
+    """Keep every history command test away from the real history file."""
+    return history_file
+
 @patch("builtins.input", return_value="yes")
 @patch("app.calculation_history.CalculationHistory.clear_history")
 @patch("logging.info")
@@ -49,6 +58,17 @@ def test_clear_command_unexpected_input(mock_logging_info, mock_clear_history, m
     mock_logging_info.assert_any_call("User initiated calculation history clear operation.")
     mock_logging_info.assert_any_call("Clear history operation was cancelled by the user.")
 
+@patch("builtins.input", side_effect=AssertionError("prompted"))
+@patch("app.calculation_history.CalculationHistory.clear_history")
+def test_clear_command_yes_skips_confirmation(mock_clear_history, mock_input, capsys):
+    """Test ClearCommand with --yes clears without prompting and rejects other arguments."""
+    command = ClearCommand()
+    command.execute("--yes")
+    mock_clear_history.assert_called_once()
+    assert command.execute("--force") is False
+    assert "Usage: clear [--yes]" in capsys.readouterr().out
+    mock_clear_history.assert_called_once()
+
 @patch("app.calculation_history.CalculationHistory.delete_history", return_value=True)
 @patch("logging.info")
 def test_delete_command_success(mock_logging_info, mock_delete_history, capsys):
@@ -111,3 +131,72 @@ def test_load_command_exception(mock_logging_error, mock_load_history, capsys):
     mock_load_history.assert_called_once()
     assert "An error occurred while trying to load the calculation history." in captured.out
     mock_logging_error.assert_called_once_with("An error occurred while trying to load the calculation history: Test exception")
+
+@patch("app.calculation_history.CalculationHistory.load_history", return_value=True)
+def test_load_command_paging_arguments(mock_load_history):
+    """Test that LoadCommand passes --tail and --offset/--limit through to load_history."""
+    command = LoadCommand()
+    command.execute("--tail 50")
+    mock_load_history.assert_called_with(tail=50)
+    command.execute("--offset 1000 --limit 100")
+    mock_load_history.assert_called_with(offset=1000, limit=100)
+
+@patch("app.calculation_history.CalculationHistory.load_history")
+def test_load_command_invalid_paging_arguments(mock_load_history, capsys):
+    """Test that LoadCommand rejects malformed paging options."""
+    command = LoadCommand()
+    for args in ("--tail", "--tail x", "--head 5", "--tail 5 --offset 2"):
+        command.execute(args)
+    mock_load_history.assert_not_called()
+    assert capsys.readouterr().out.count("Usage: load [--tail N | --offset N] [--limit N]") == 4
+
+@patch("app.calculation_history.CalculationHistory.compact_history", return_value=3)
+def test_compact_command(mock_compact_history, capsys):
+    """Test CompactCommand reports how many tombstoned records were removed."""
+    CompactCommand().execute("")
+    mock_compact_history.assert_called_once()
+    assert "History compacted: 3 deleted records removed." in capsys.readouterr().out
+
+@patch("app.calculation_history.CalculationHistory.compact_history", return_value=0)
+def test_compact_command_nothing_to_do(mock_compact_history, capsys):
+    """Test CompactCommand when there are no tombstones."""
+    CompactCommand().execute("")
+    assert "Nothing to compact." in capsys.readouterr().out
+
+def test_history_stats_command(history_file, capsys):
+    """Test 'history stats' for all operations, one operation and an unknown one."""
+    command = HistoryCommand()
+    command.execute("stats")
+    assert "History is empty." in capsys.readouterr().out
+    history = CalculationHistory()
+    history.add_records(["1.0 + 2.0", "3.0 + 4.0", "1.0 / 4.0"], [3.0, 7.0, 0.25])
+    command.execute("stats")
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ["Operation", "Count", "Sum", "Mean", "Std", "dev", "Min", "Max"]
+    assert lines[1].split() == ["add", "2", "10", "5", "2.82843", "3", "7"]
+    assert lines[2].split() == ["divide", "1", "0.25", "0.25", "0", "0.25", "0.25"]
+    assert lines[3].split()[:3] == ["all", "3", "10.25"]
+    command.execute("stats DIVIDE")
+    assert capsys.readouterr().out.splitlines()[1].split()[:2] == ["divide", "1"]
+    command.execute("stats modulo")
+    assert "No history records for operation 'modulo'." in capsys.readouterr().out
+    command.execute("")
+    assert "Usage: history stats [<operation>]" in capsys.readouterr().out
+
+def test_history_find_command(history_file, capsys):
+    """Test 'history find' output, the display limit and invalid filters."""
+    history = CalculationHistory()
+    history.add_records(["1.0 + 2.0", "3.0 + 4.0", "3.0 * 5.0"], [3.0, 7.0, 15.0])
+    command = HistoryCommand()
+    command.execute("find --operand 3 --min 5")
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split() for line in lines[1:]] == [["1", "3.0", "+", "4.0", "7.0"], ["2", "3.0", "*", "5.0", "15.0"]]
+    command.execute("find --op add --limit 1")
+    out = capsys.readouterr().out
+    assert "Showing 1 of 2 matches" in out
+    command.execute("find --op divide")
+    assert "No matching records." in capsys.readouterr().out
+    for args in ("find", "find --op modulo", "find --min x", "find --limit 0", "find --op"):
+        command.execute(args)
+        assert "history find [--op <operation>]" in capsys.readouterr().out
+
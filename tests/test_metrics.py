@@ -0,0 +1,92 @@
+"""Tests for the per-command latency instrumentation and the stats command."""
+import pytest
+from app.commands import CommandHandler
+from app.metrics import BUCKETS, CommandMetrics, Histogram, PeriodicDump, timed
+from app.plugins.add import AddCommand
+from app.plugins.stats import StatsCommand
+from app.result_cache import ResultCache
+
+@pytest.fixture
+def metrics(monkeypatch):
+    """Provide fresh CommandMetrics and an uncached ResultCache."""
+    monkeypatch.setenv("RESULT_CACHE_SIZE", "0")
+    CommandMetrics._instance = None
+    ResultCache._instance = None
+    yield CommandMetrics()
+    CommandMetrics._instance = None
+    ResultCache._instance = None
+
+def test_histogram_buckets_and_percentiles():
+    """Test that observations land in the right bucket and percentiles use bucket bounds."""
+    histogram = Histogram()
+    for _ in range(90):
+        histogram.record(0.0000008, 0.0000005)
+    for _ in range(10):
+        histogram.record(0.003, 0.002)
+    assert histogram.count == 100
+    assert histogram.counts[0] == 90
+    assert histogram.percentile(0.5) == BUCKETS[0]
+    assert histogram.percentile(0.95) == 0.005
+    assert histogram.cpu_sum == pytest.approx(90 * 0.0000005 + 10 * 0.002)
+
+def test_timed_outside_a_command_records_nothing(metrics):
+    """Test that phases timed with no current command (e.g. in workers) are dropped."""
+    with timed('compute'):
+        pass
+    assert metrics.summary() == []
+
+def test_execute_command_records_plugin_phases(metrics, history_file):
+    """Test that an add records parse, compute, persist, log and total phases."""
+    handler = CommandHandler()
+    handler.register_command('add', AddCommand())
+    handler.execute_command('add', '1 2')
+    handler.execute_command('add', '3 4')
+    rows = {(command, phase): count for command, phase, count, *_ in metrics.summary()}
+    assert rows == {('add', phase): 2 for phase in ('parse', 'compute', 'persist', 'log', 'total')}
+
+def test_metrics_disabled(monkeypatch, metrics, history_file):
+    """Test that METRICS_ENABLED=false turns the timers off."""
+    monkeypatch.setenv("METRICS_ENABLED", "false")
+    CommandMetrics._instance = None
+    handler = CommandHandler()
+    handler.register_command('add', AddCommand())
+    handler.execute_command('add', '1 2')
+    assert CommandMetrics().summary() == []
+
+def test_render_prometheus(metrics):
+    """Test the Prometheus histogram and CPU counter output."""
+    metrics.record('add', 'compute', 0.0000015, 0.000001)
+    text = metrics.render_prometheus()
+    assert '# TYPE calculator_command_seconds histogram' in text
+    assert 'calculator_command_seconds_bucket{command="add",phase="compute",le="1e-06"} 0' in text
+    assert 'calculator_command_seconds_bucket{command="add",phase="compute",le="2.5e-06"} 1' in text
+    assert 'calculator_command_seconds_bucket{command="add",phase="compute",le="+Inf"} 1' in text
+    assert 'calculator_command_seconds_count{command="add",phase="compute"} 1' in text
+    assert 'calculator_command_cpu_seconds_total{command="add",phase="compute"} 1e-06' in text
+
+def test_stats_command(metrics, history_file, tmp_path, capsys):
+    """Test the stats table, dump and reset actions."""
+    StatsCommand().execute("")
+    assert "No commands have been timed yet." in capsys.readouterr().out
+    handler = CommandHandler()
+    handler.register_command('add', AddCommand())
+    handler.execute_command('add', '1 2')
+    StatsCommand().execute("")
+    out = capsys.readouterr().out
+    assert "p99 us" in out
+    assert "add        compute         1" in out
+    StatsCommand().execute(f"dump {tmp_path / 'metrics.prom'}")
+    assert 'phase="total"' in (tmp_path / 'metrics.prom').read_text()
+    StatsCommand().execute("reset")
+    assert metrics.summary() == []
+    StatsCommand().execute("bogus")
+    assert "Usage: stats [reset | dump [<file>]]" in capsys.readouterr().out
+
+def test_periodic_dump_writes_final_snapshot(metrics, tmp_path):
+    """Test that stopping the periodic dump writes the current metrics."""
+    path = tmp_path / "metrics.prom"
+    dump = PeriodicDump(str(path), 3600).start()
+    metrics.record('eval', 'total', 0.001, 0.001)
+    dump.stop()
+    dump.stop()
+    assert 'command="eval"' in path.read_text()
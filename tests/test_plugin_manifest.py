@@ -0,0 +1,63 @@
+"""Tests for the cached plugin manifest and lazily loaded plugin commands."""
+import os
+from unittest.mock import patch
+
+from app import App
+from app.commands import CommandHandler, LazyCommand
+from app.plugin_manifest import load_manifest
+from app.plugins.add import AddCommand
+
+def make_plugin_dir(tmp_path, *names):
+    """Create a fake plugin directory containing one package per name."""
+    plugins = tmp_path / "plugins"
+    for name in names:
+        (plugins / name).mkdir(parents=True)
+        (plugins / name / "__init__.py").write_text("")
+    return plugins
+
+def test_manifest_lists_plugins_without_importing(tmp_path):
+    """Test that the manifest is built from the directory listing alone."""
+    plugins = make_plugin_dir(tmp_path, "add", "power")
+    entries = load_manifest(tmp_path / "manifest.json", [(str(plugins), "fake.plugins")])
+    assert sorted(entries, key=lambda e: e['name']) == [
+        {'name': 'add', 'module': 'fake.plugins.add', 'class': 'AddCommand'},
+        {'name': 'power', 'module': 'fake.plugins.power', 'class': 'PowerCommand'},
+    ]
+
+def test_manifest_is_reused_until_directories_change(tmp_path):
+    """Test that an unchanged plugin tree is served from the cache and a new plugin invalidates it."""
+    plugins = make_plugin_dir(tmp_path, "add")
+    manifest, directories = tmp_path / "manifest.json", [(str(plugins), "fake.plugins")]
+    load_manifest(manifest, directories)
+    with patch("app.plugin_manifest.scan_plugins") as mock_scan:
+        assert [e['name'] for e in load_manifest(manifest, directories)] == ['add']
+    mock_scan.assert_not_called()
+
+    (plugins / "power").mkdir()
+    (plugins / "power" / "__init__.py").write_text("")
+    os.utime(plugins, ns=(0, 0))
+    assert sorted(e['name'] for e in load_manifest(manifest, directories)) == ['add', 'power']
+
+def test_app_registers_lazy_plugins(tmp_path, monkeypatch):
+    """Test that the app registers proxies instead of importing plugins at startup."""
+    monkeypatch.setenv("PLUGIN_MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    app = App()
+    app.load_plugins()
+    commands = app.command_handler.commands
+    assert {'add', 'divide', 'load', 'bulk'} <= set(commands)
+    assert all(isinstance(command, LazyCommand) for command in commands.values())
+
+def test_lazy_command_resolved_on_first_execute(history_file, capsys):
+    """Test that the handler swaps a proxy for the real command the first time it runs."""
+    handler = CommandHandler()
+    handler.register_command("add", LazyCommand("app.plugins.add", "AddCommand"))
+    with patch("app.calculation_history.CalculationHistory.add_record"):
+        assert handler.execute_command("add", "1 2") is True
+    assert isinstance(handler.commands["add"], AddCommand)
+    assert "1.0 + 2.0 = 3.0" in capsys.readouterr().out
+
+def test_lazy_command_import_error_is_reported():
+    """Test that a plugin that fails to import is reported as a failed command."""
+    handler = CommandHandler()
+    handler.register_command("broken", LazyCommand("app.plugins.missing", "MissingCommand"))
+    assert handler.execute_command("broken") is False
@@ -0,0 +1,98 @@
+"""Tests for the asyncio server mode."""
+import asyncio
+import json
+from unittest.mock import patch
+import pytest
+from app import App
+from app.calculation_history import CalculationHistory
+from app.server import CalculatorServer
+
+@pytest.fixture
+def server(history_file):
+    """A server wired to a fully loaded command handler."""
+    app = App()
+    app.prepare()
+    return CalculatorServer(app.command_handler, commit_window=0.01)
+
+async def send_lines(port, lines):
+    """Sends each line over the TCP protocol and collects the JSON responses."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    responses = []
+    for line in lines:
+        writer.write(f"{line}\n".encode())
+        await writer.drain()
+        responses.append(json.loads(await reader.readline()))
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+def test_line_protocol_concurrent_clients_group_commit(server, history_file):
+    """Concurrent clients get their own output and history writes are batched."""
+    async def scenario():
+        servers = await server.start(port=0)
+        port = servers[0].sockets[0].getsockname()[1]
+        with patch.object(CalculationHistory, 'append_records',
+                          autospec=True, side_effect=CalculationHistory.append_records) as append:
+            results = await asyncio.gather(*(send_lines(port, [f"add {client} {n}" for n in range(10)])
+                                             for client in range(20)))
+            await server.stop()
+        return results, append.call_count
+    results, writes = asyncio.run(scenario())
+    for client, responses in enumerate(results):
+        assert [response['output'] for response in responses] == [f"{float(client)} + {float(n)} = {float(client + n)}\n" for n in range(10)]
+        assert all(response['ok'] for response in responses)
+    assert writes < 200
+    assert len(history_file.read_text().splitlines()) == 201
+
+def test_response_waits_for_the_history_commit(history_file):
+    """A client is answered only once its history row is in the file, not when it is buffered."""
+    app = App()
+    app.prepare()
+    server = CalculatorServer(app.command_handler, commit_window=0.3)
+    async def scenario():
+        servers = await server.start(port=0)
+        port = servers[0].sockets[0].getsockname()[1]
+        responses = await send_lines(port, ['add 1 2'])
+        stored = history_file.read_text().splitlines()
+        await server.stop()
+        return responses, stored
+    responses, stored = asyncio.run(scenario())
+    assert responses == [{'ok': True, 'output': "1.0 + 2.0 = 3.0\n"}]
+    assert stored[-1] == "1.0 + 2.0,3.0"
+
+@pytest.mark.parametrize("command", ['clear', 'nosuch 1', 'bulk add in.csv out.csv',
+                                     'profile stop out.prof', 'stats dump out.prom', 'stats reset'])
+def test_line_protocol_refuses_commands_outside_the_allowlist(server, command):
+    """Commands that are not explicitly served, or that name a file, are refused."""
+    async def scenario():
+        servers = await server.start(port=0)
+        port = servers[0].sockets[0].getsockname()[1]
+        responses = await send_lines(port, [command, 'stats'])
+        await server.stop()
+        return responses
+    refused, stats = asyncio.run(scenario())
+    assert refused == {'ok': False, 'output': f"Command '{command}' is not available over the network.\n"}
+    assert stats['ok'] is True
+
+def test_http_command_endpoint(server):
+    """POST /command runs the command; other paths are rejected."""
+    async def request(port, method, path, body=b''):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, payload = response.partition(b'\r\n\r\n')
+        return int(head.split()[1]), json.loads(payload)
+    async def scenario():
+        servers = await server.start(port=0, http_port=0)
+        port = servers[1].sockets[0].getsockname()[1]
+        responses = [await request(port, 'POST', '/command', b'{"command": "multiply 3 4"}'),
+                     await request(port, 'GET', '/command'),
+                     await request(port, 'POST', '/other')]
+        await server.stop()
+        return responses
+    ok, wrong_method, missing = asyncio.run(scenario())
+    assert ok == (200, {'ok': True, 'output': "3.0 * 4.0 = 12.0\n"})
+    assert wrong_method[0] == 405
+    assert missing[0] == 404